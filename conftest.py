@@ -0,0 +1,10 @@
+import pytest
+
+from yatube.test_runner import temporary_cache
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _temporary_cache():
+    """Кеш на время прогона — временный файл, как в manage.py test."""
+    with temporary_cache():
+        yield
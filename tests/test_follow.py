@@ -123,7 +123,7 @@ class TestFollow:
         assert 'page' in response.context, (
             'Проверьте, что передали переменную `page` в контекст страницы `/follow/`'
         )
-        assert type(response.context['page']) == Page, (
+        assert isinstance(response.context['page'], Page), (
             'Проверьте, что переменная `page` на странице `/follow/` типа `Page`'
         )
         assert len(response.context['page']) == 2, (
@@ -0,0 +1,90 @@
+"""Аутентификация API с кешем токен → пользователь.
+
+TokenAuthentication и JWTAuthentication читают пользователя из базы на
+каждом запросе. Здесь снимок пользователя (для Token — вместе с
+токеном) живёт AUTH_CACHE_TIMEOUT секунд в кеше процесса 'auth', так
+что пользователь с хешем пароля и токены не попадают в общий кеш на
+диске. В общем кеше лежат только версии пользователя и токена: сигналы
+сдвигают их, когда токен удалён, а пользователь изменён (в том числе
+отключён или сменил пароль) или удалён (см. api.signals), и снимок с
+прежней версией не используется ни в одном процессе. Изменения в обход
+сигналов, например QuerySet.update(), видны не позже чем через
+AUTH_CACHE_TIMEOUT.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from posts import page_cache
+
+SNAPSHOT_CACHE = 'auth'
+
+
+def token_version_name(key) -> str:
+    return 'auth_token_' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def user_version_name(user_id) -> str:
+    return f'auth_user_{user_id}'
+
+
+def _bump(name):
+    """Сдвигает версию сразу и ещё раз после коммита: снимок, прочитанный
+    из базы до коммита, тоже станет устаревшим."""
+    page_cache.bump(name)
+    transaction.on_commit(lambda: page_cache.bump(name))
+
+
+def forget_token(key):
+    _bump(token_version_name(key))
+
+
+def forget_user(user):
+    """Делает устаревшими снимки пользователя по JWT и по его токенам."""
+    _bump(user_version_name(getattr(user, jwt_settings.USER_ID_FIELD)))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication со снимком (пользователь, токен) по ключу."""
+
+    def authenticate_credentials(self, key):
+        snapshots = caches[SNAPSHOT_CACHE]
+        name = token_version_name(key)
+        cached = snapshots.get(name)
+        if cached is not None:
+            user_name, versions, snapshot = cached
+            if page_cache.versions(name, user_name) == versions:
+                return snapshot
+        user, token = super().authenticate_credentials(key)
+        user_name = user_version_name(
+            getattr(user, jwt_settings.USER_ID_FIELD)
+        )
+        snapshots.set(
+            name, (user_name, page_cache.versions(name, user_name),
+                   (user, token)),
+            settings.AUTH_CACHE_TIMEOUT,
+        )
+        return user, token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication со снимком пользователя по id из токена."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        snapshots = caches[SNAPSHOT_CACHE]
+        name = user_version_name(user_id)
+        version = page_cache.versions(name)[0]
+        cached = snapshots.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        user = super().get_user(validated_token)
+        snapshots.set(name, (version, user), settings.AUTH_CACHE_TIMEOUT)
+        return user
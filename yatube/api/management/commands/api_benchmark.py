@@ -0,0 +1,75 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.views import PostViewSet
+from posts.models import Comment, Group, Post, User
+
+BENCHMARK_USERNAME = 'api_benchmark'
+BATCH_SIZE = 1000
+PAGE_SIZES = (10, 25, 50, 100)
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время ответа GET /api/v1/posts/ и число запросов к '
+        'базе в зависимости от размера страницы. Данные создаются во '
+        'временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=3)
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        view = PostViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            self.fill(options['posts'], options['comments'], rng)
+            for page_size in PAGE_SIZES:
+                request = factory.get(
+                    '/api/v1/posts/', {'page_size': page_size}
+                )
+                with CaptureQueriesContext(connection) as queries:
+                    view(request).render()
+                start = time.perf_counter()
+                for _ in range(options['requests']):
+                    view(request).render()
+                elapsed = (time.perf_counter() - start) / options['requests']
+                self.stdout.write(
+                    f'страница {page_size:>3}: {elapsed * 1000:8.2f} мс, '
+                    f'запросов {len(queries)}'
+                )
+            transaction.set_rollback(True)
+
+    def fill(self, total, comments, rng):
+        authors = [
+            User.objects.create(username=f'{BENCHMARK_USERNAME}_{number}')
+            for number in range(20)
+        ]
+        groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'{BENCHMARK_USERNAME}_{number}'
+            )
+            for number in range(5)
+        ]
+        for start in range(0, total, BATCH_SIZE):
+            posts = Post.objects.bulk_create(
+                Post(author=rng.choice(authors), group=rng.choice(groups),
+                     text=f'пост {number}')
+                for number in range(start, min(start + BATCH_SIZE, total))
+            )
+            if posts[0].pk is None:
+                posts = Post.objects.order_by('-pk')[:len(posts)]
+            Comment.objects.bulk_create(
+                Comment(post=post, author=rng.choice(authors),
+                        text=f'комментарий {number}')
+                for post in posts
+                for number in range(comments)
+            )
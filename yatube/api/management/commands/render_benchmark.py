@@ -0,0 +1,81 @@
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, stream_list
+from api.serializers import PostSerializer
+from posts.models import Group, Post, User
+
+BENCHMARK_USERNAME = 'render_benchmark'
+BATCH_SIZE = 1000
+# Пиковый RSS процесса только растёт, поэтому режимы идут от самого
+# экономного к самому затратному.
+MODES = ('stream', 'fast', 'default')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выдачу списка постов целиком: JSONRenderer, '
+        'FastJSONRenderer и потоковую stream_list. Печатает списков в '
+        'секунду, пик памяти Python (tracemalloc) и пиковый RSS процесса. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--requests', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.fill(options['posts'])
+            queryset = Post.objects.select_related('author').prefetch_related(
+                'comments'
+            ).order_by('-pk')
+            for mode in MODES:
+                render = getattr(self, 'render_' + mode)
+                tracemalloc.start()
+                size = render(queryset)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                # ru_maxrss в Linux — в килобайтах.
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                # Время меряется отдельно: tracemalloc замедляет в разы.
+                start = time.perf_counter()
+                for _ in range(options['requests']):
+                    render(queryset)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{mode:>8}: {options["requests"] / elapsed:6.2f} в с, '
+                    f'{size / 2 ** 20:6.1f} МБ ответа, '
+                    f'пик Python {peak / 2 ** 20:7.1f} МБ, '
+                    f'RSS {rss / 2 ** 10:7.1f} МБ'
+                )
+            transaction.set_rollback(True)
+
+    def render_default(self, queryset) -> int:
+        data = PostSerializer(queryset.all(), many=True).data
+        return len(JSONRenderer().render(data))
+
+    def render_fast(self, queryset) -> int:
+        data = PostSerializer(queryset.all(), many=True).data
+        return len(FastJSONRenderer().render(data))
+
+    def render_stream(self, queryset) -> int:
+        return sum(len(chunk) for chunk in stream_list(
+            queryset, lambda posts: PostSerializer(posts, many=True)
+        ))
+
+    def fill(self, total):
+        author = User.objects.create(username=BENCHMARK_USERNAME)
+        group = Group.objects.create(
+            title='Группа', slug=BENCHMARK_USERNAME
+        )
+        for start in range(0, total, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(author=author, group=group, text=f'пост {number} ' * 20)
+                for number in range(start, min(start + BATCH_SIZE, total))
+            )
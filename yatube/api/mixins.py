@@ -0,0 +1,112 @@
+from django.http import StreamingHttpResponse
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from posts import conditional, page_cache
+
+from .renderers import stream_list
+
+
+class ConditionalListMixin:
+    """Список с ETag: пока маркеры не сдвинулись, ответ 304 отдаётся
+    без выборки и сериализации."""
+
+    list_markers = (page_cache.FEED,)
+
+    def get_list_markers(self):
+        """Имена версий, от которых зависит список."""
+        return self.list_markers
+
+    def list(self, request, *args, **kwargs):
+        etag = quote_etag(conditional.make_etag(
+            request, *page_cache.versions(*self.get_list_markers())
+        ))
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        weak_etags = {tag[2:] if tag.startswith('W/') else tag
+                      for tag in if_none_match}
+        if etag in weak_etags or '*' in weak_etags:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+
+class SparseFieldsViewMixin:
+    """?fields=a,b и ?include=x,y (см. serializers.SparseFieldsMixin).
+
+    В выборку попадают только нужные ответу связи: related_fields и
+    prefetch_fields — связи полей по умолчанию, select_includes и
+    prefetch_includes — связи встраиваемых объектов.
+    """
+
+    related_fields = {}
+    prefetch_fields = {}
+    select_includes = {}
+    prefetch_includes = {}
+
+    def get_requested(self, param):
+        """Множество имён из параметра или None, если его нет."""
+        value = self.request and self.request.query_params.get(param)
+        if not value:
+            return None
+        return frozenset(filter(None, (
+            name.strip() for name in value.split(',')
+        )))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested('fields')
+        context['include'] = self.get_requested('include') or frozenset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested('fields')
+        include = self.get_requested('include') or frozenset()
+        select = [
+            lookup for name, lookup in self.related_fields.items()
+            if fields is None or name in fields
+        ]
+        select += [self.select_includes[name]
+                   for name in sorted(include & self.select_includes.keys())]
+        prefetch = [
+            lookup for name, lookup in self.prefetch_fields.items()
+            if (fields is None or name in fields) and name not in include
+        ]
+        prefetch += [
+            self.prefetch_includes[name]
+            for name in sorted(include & self.prefetch_includes.keys())
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class StreamingListMixin:
+    """?stream=1 отдаёт весь список без пагинации потоком JSON-массива.
+
+    Строки читаются и сериализуются кусками, каждый своим запросом (см.
+    renderers.stream_list), поэтому память не зависит от длины списка.
+    """
+
+    stream_query_param = 'stream'
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param) not in (
+            '1', 'true'
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_list(queryset, lambda objects: self.get_serializer(
+                objects, many=True
+            )),
+            content_type='application/json',
+        )
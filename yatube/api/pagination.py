@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from posts.paginators import CursorPaginator
+from yatube.settings import NUMBER_PAGINATION_PAGES
+
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по ключу (дата, id), см. CursorPaginator.
+
+    Поле даты берётся из cursor_key_field представления. Размер
+    страницы задаётся ?page_size= не больше MAX_PAGE_SIZE.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    key_field = 'pub_date'
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return NUMBER_PAGINATION_PAGES
+        return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = CursorPaginator(
+            queryset, self.get_page_size(request),
+            key_field=getattr(view, 'cursor_key_field', self.key_field),
+        )
+        self.page = paginator.get_page(
+            request.query_params.get(self.cursor_query_param)
+        )
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict((
+            ('next', self.get_link(self.page.next_cursor())),
+            ('previous', self.get_link(self.page.previous_cursor())),
+            ('results', data),
+        )))
+
+
+class RankedPagination(PageNumberPagination):
+    """Постраничная выдача для результатов поиска: порядок по
+    релевантности не годится в ключ курсора."""
+
+    page_size = NUMBER_PAGINATION_PAGES
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
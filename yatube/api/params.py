@@ -0,0 +1,12 @@
+import re
+
+# ASCII-цифры: str.isdigit() пропускает и '²', на котором падает int().
+# 18 цифр помещаются в INTEGER SQLite.
+ID_PATTERN = re.compile(r'[0-9]{1,18}')
+
+
+def parse_id(value):
+    """Неотрицательное целое из параметра запроса или None."""
+    if value is None or not ID_PATTERN.fullmatch(value):
+        return None
+    return int(value)
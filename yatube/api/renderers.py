@@ -0,0 +1,119 @@
+"""Быстрый JSON для API и потоковая выдача больших списков.
+
+FastJSONRenderer кодирует ответ через orjson, если он установлен, и
+уступает обычному JSONRenderer для ответов с отступами. stream_list
+отдаёт список кусками по STREAM_CHUNK_SIZE, так что память не растёт с
+длиной списка. Как и в api.export, каждый кусок — отдельный запрос с
+условием по ключу сортировки последней отданной строки, поэтому долгая
+выдача не держит открытым курсор базы (и блокировку чтения SQLite).
+"""
+from django.db.models import F, Q
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_CHUNK_SIZE = 500
+# Как и JSONRenderer, экранируем разделители строк, которых нет в JS.
+LINE_SEPARATORS = (('\u2028'.encode(), b'\\u2028'),
+                   ('\u2029'.encode(), b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson."""
+
+    def __init__(self):
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        return self.dumps(data)
+
+    def dumps(self, data) -> bytes:
+        if orjson is None:
+            return super().render(data)
+        rendered = orjson.dumps(data, default=self.encoder.default)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in rendered:
+                rendered = rendered.replace(separator, escaped)
+        return rendered
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """JSON по объекту на строку; так же отдаются и ошибки выгрузки."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.dumps(data) + b'\n'
+
+
+def _ordering(queryset) -> list:
+    """Ключ сортировки queryset: [(поле, по убыванию)], последним — pk.
+
+    Поля сортировки должны быть именами полей без NULL.
+    """
+    query = queryset.query
+    names = list(query.order_by or (
+        query.default_ordering and queryset.model._meta.ordering or ()
+    ))
+    keys = [(name.lstrip('-'), name.startswith('-')) for name in names]
+    if not any(name in ('pk', queryset.model._meta.pk.name)
+               for name, _ in keys):
+        keys.append(('pk', keys[-1][1] if keys else False))
+    return keys
+
+
+def _after(keys, values) -> Q:
+    """Строки после ключа values в порядке keys."""
+    condition, equal = Q(), Q()
+    for (name, descending), value in zip(keys, values):
+        lookup = '__lt' if descending else '__gt'
+        condition |= equal & Q(**{name + lookup: value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def stream_list(queryset, serializer_factory, chunk_size=None):
+    """Куски JSON-массива из объектов queryset.
+
+    Значения ключа сортировки выбираются вместе со строками как
+    аннотации, по ним строится условие следующего куска.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    renderer = FastJSONRenderer()
+    keys = _ordering(queryset)
+    aliases = [f'_stream_key_{number}' for number in range(len(keys))]
+    queryset = queryset.annotate(**{
+        alias: F(name) for alias, (name, _) in zip(aliases, keys)
+    }).order_by(*(
+        ('-' if descending else '') + name for name, descending in keys
+    ))
+    position, first = None, True
+    yield b'['
+    while True:
+        chunk = queryset
+        if position is not None:
+            chunk = chunk.filter(_after(keys, position))
+        rows = list(chunk[:chunk_size])
+        if rows:
+            rendered = renderer.dumps(serializer_factory(rows).data)
+            # Внутренность массива без скобок; куски разделяются запятой.
+            yield (b'' if first else b',') + rendered[1:-1]
+            first = False
+        if len(rows) < chunk_size:
+            break
+        position = [getattr(rows[-1], alias) for alias in aliases]
+    yield b']'
@@ -1,10 +1,44 @@
+from djoser import serializers as djoser_serializers
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
 from posts.models import Comment, Follow, Group, Post, User
+from posts import uploads
+from users.validators import validate_username
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Поля ответа по ?fields= и встроенные объекты по ?include=.
+
+    Списки имён кладёт в контекст SparseFieldsViewMixin; они относятся
+    только к объектам верхнего уровня, не к встроенным. included_fields —
+    поля, которые появляются или меняются при ?include=.
+    """
+
+    included_fields = {}
+
+    def is_top_level(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_top_level():
+            return fields
+        requested = self.context.get('fields')
+        if requested:
+            for name in list(fields):
+                if name not in requested:
+                    del fields[name]
+        for name in self.context.get('include', ()):
+            if name in self.included_fields:
+                fields[name] = self.included_fields[name]()
+        return fields
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -12,22 +46,57 @@ class UserSerializer(serializers.ModelSerializer):
         ref_name = 'UserSerializer'
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Group
         fields = '__all__'
 
 
-class PostSerializer(serializers.ModelSerializer):
-    group = serializers.SlugRelatedField(
-        slug_field='id', queryset=Group.objects.all(), required=False
+class ImageUploadField(serializers.ImageField):
+    """ImageField с пределами и нормализацией загрузки (posts.uploads)."""
+
+    def get_value(self, dictionary):
+        rejected = uploads.rejected(
+            self.context.get('request'), self.field_name
+        )
+        if rejected is not None:
+            return rejected
+        return super().get_value(dictionary)
+
+    def to_internal_value(self, data):
+        uploads.check_size(data)
+        return uploads.clean_image(super().to_internal_value(data))
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = '__all__'
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Пост; по умолчанию группа — id, комментарии — их тексты, как и
+    раньше. ?include=group и ?include=comments встраивают объекты."""
+
+    # Тот же id группы, что и SlugRelatedField по 'id', но без запроса
+    # группы на каждый пост.
+    group = serializers.PrimaryKeyRelatedField(
+        queryset=Group.objects.all(), required=False, allow_null=True
     )
     author = serializers.CharField(source='author.username', read_only=True)
     comments = serializers.SlugRelatedField(
         slug_field='text', queryset=Comment.objects.all(),
         many=True, required=False
     )
+    image = ImageUploadField(required=False, allow_null=True)
+
+    included_fields = {
+        'group': lambda: GroupSerializer(read_only=True),
+        'comments': lambda: CommentSerializer(many=True, read_only=True),
+    }
 
     class Meta:
         model = Post
@@ -35,15 +104,7 @@ class PostSerializer(serializers.ModelSerializer):
         read_only_fields = ('author',)
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    author = serializers.CharField(source='author.username', read_only=True)
-
-    class Meta:
-        model = Comment
-        fields = '__all__'
-
-
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         read_only=True, slug_field='username'
@@ -64,3 +125,34 @@ class FollowSerializer(serializers.ModelSerializer):
         if value == self.context['request'].user:
             raise serializers.ValidationError()
         return value
+
+
+class ReservedUsernameMixin:
+    """Имя пользователя не занимает адрес сайта (users.validators).
+
+    username — у регистрации, new_username — у смены имени.
+    """
+
+    def validate_username(self, value):
+        validate_username(value)
+        return value
+
+    def validate_new_username(self, value):
+        validate_username(value)
+        return value
+
+
+class UserCreateSerializer(ReservedUsernameMixin,
+                           djoser_serializers.UserCreateSerializer):
+    pass
+
+
+class SetUsernameSerializer(ReservedUsernameMixin,
+                            djoser_serializers.SetUsernameSerializer):
+    pass
+
+
+class UsernameResetConfirmSerializer(
+    ReservedUsernameMixin, djoser_serializers.UsernameResetConfirmSerializer
+):
+    pass
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import User
+
+
+class ApiAuthCacheTest(TestCase):
+    """Тестирование кеша пользователя по токену API."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Cached")
+
+    def setUp(self):
+        cache.clear()
+        self.user.refresh_from_db()
+        self.token = Token.objects.get_or_create(user=self.user)[0]
+
+    def get(self, authorization):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("api-v1:changes-list"),
+                HTTP_AUTHORIZATION=authorization,
+            )
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        return response.status_code, sql
+
+    def test_token_snapshot_and_invalidation(self):
+        authorization = f"Token {self.token.key}"
+        self.assertEqual(self.get(authorization)[0], 200)
+        status_code, sql = self.get(authorization)
+        self.assertEqual(status_code, 200)
+        self.assertNotIn("authtoken_token", sql)
+        self.token.delete()
+        self.assertEqual(self.get(authorization)[0], 401)
+
+    def test_shared_cache_holds_no_credentials(self):
+        """В общий кеш не попадают ни токен, ни хеш пароля."""
+        self.user.set_password("пароль")
+        self.user.save()
+        self.get(f"Token {self.token.key}")
+        self.get(f"Bearer {AccessToken.for_user(self.user)}")
+        values = repr(cache._connection().execute(
+            "SELECT value FROM cache"
+        ).fetchall())
+        self.assertNotIn(self.token.key, values)
+        self.assertNotIn(self.user.password, values)
+
+    def test_jwt_snapshot_and_deactivation(self):
+        authorization = f"Bearer {AccessToken.for_user(self.user)}"
+        self.assertEqual(self.get(authorization)[0], 200)
+        status_code, sql = self.get(authorization)
+        self.assertEqual(status_code, 200)
+        self.assertNotIn("auth_user", sql)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(authorization)[0], 401)
+        self.assertEqual(self.get(f"Token {self.token.key}")[0], 401)
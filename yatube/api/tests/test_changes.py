@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from posts.models import Change, Comment, Follow, Post, User
+
+
+class ApiChangesTest(TestCase):
+    """Тестирование журнала изменений для синхронизации клиентов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Writer")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def changes(self, **params):
+        response = self.client.get(
+            reverse("api-v1:changes-list"), params,
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+        )
+        return response.status_code, response.json()
+
+    def test_reports_changes_since_cursor(self):
+        _, start = self.changes()
+        old = Post.objects.create(text="старый", author=self.author)
+        comment = Comment.objects.create(
+            text="комментарий", author=self.author, post=old
+        )
+        _, middle = self.changes(cursor=start["cursor"])
+        self.assertEqual(middle["changes"]["posts"]["created"], [old.pk])
+        self.assertEqual(
+            middle["changes"]["comments"]["created"], [comment.pk]
+        )
+        new = Post.objects.create(text="новый", author=self.author)
+        new.text = "новый, правка"
+        new.save()
+        old.text = "старый, правка"
+        old.save()
+        Follow.objects.create(user=self.author, author=self.user)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.client.force_login(self.author)
+        self.client.get(reverse(
+            "posts:delete_comment",
+            args=(self.author.username, old.pk, comment.pk),
+        ))
+        _, end = self.changes(cursor=middle["cursor"])
+        self.assertEqual(end["changes"]["posts"], {
+            "created": [new.pk], "updated": [old.pk], "deleted": [],
+        })
+        self.assertEqual(
+            end["changes"]["comments"]["deleted"], [comment.pk]
+        )
+        self.assertEqual(end["changes"]["follows"]["created"], [follow.pk])
+        self.assertFalse(end["more"])
+        self.assertEqual(self.changes(cursor=end["cursor"])[1]["changes"]
+                         ["posts"]["updated"], [])
+
+    @override_settings(CHANGES_PAGE_SIZE=1)
+    def test_pages_and_expiry(self):
+        _, start = self.changes()
+        for number in range(2):
+            Post.objects.create(text=f"пост {number}", author=self.author)
+        _, first = self.changes(cursor=start["cursor"])
+        self.assertTrue(first["more"])
+        _, second = self.changes(cursor=first["cursor"])
+        self.assertFalse(second["more"])
+        Change.objects.filter(id__lte=first["cursor"]).delete()
+        self.assertEqual(self.changes(cursor=start["cursor"])[0], 410)
+        for cursor in ("x", "²", "9" * 23):
+            self.assertEqual(self.changes(cursor=cursor)[0], 400)
+
+    def test_gap_in_ids_is_not_expiry(self):
+        Post.objects.create(text="пост", author=self.author)
+        _, start = self.changes()
+        Post.objects.create(text="пост", author=self.author)
+        Change.objects.filter(id__gt=start["cursor"]).update(
+            id=start["cursor"] + 5
+        )
+        status_code, changes = self.changes(cursor=start["cursor"])
+        self.assertEqual(status_code, 200)
+        self.assertEqual(len(changes["changes"]["posts"]["created"]), 1)
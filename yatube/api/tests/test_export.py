@@ -0,0 +1,73 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from posts.models import Comment, Follow, Post, User
+
+
+class ApiExportTest(TestCase):
+    """Тестирование NDJSON-выгрузки API."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Analyst")
+        cls.token = Token.objects.create(user=cls.user)
+        for number in range(5):
+            author = User.objects.create_user(username=f"Author_{number}")
+            post = Post.objects.create(text=f"пост {number}", author=author)
+            Comment.objects.create(text=f"комментарий {number}",
+                                   author=author, post=post)
+            Follow.objects.create(user=cls.user, author=author)
+
+    def export(self, name, **params):
+        response = self.client.get(
+            reverse(f"api-v1:export-{name}-list"), params,
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_requires_authentication(self):
+        response = self.client.get(reverse("api-v1:export-posts-list"))
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_exports_all_rows_in_key_order(self):
+        posts = self.export("posts")
+        self.assertEqual([post["text"] for post in posts],
+                         [f"пост {number}" for number in range(5)])
+        comments = self.export("comments")
+        self.assertEqual(comments[0]["text"], "комментарий 0")
+        self.assertEqual(len(comments), 5)
+        follows = self.export("follows")
+        self.assertEqual([follow["author"] for follow in follows],
+                         [f"Author_{number}" for number in range(5)])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_resumes_after_last_row(self):
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        posts = self.export("posts")
+        rest = self.export(
+            "posts", since=posts[1]["pub_date"], after_id=posts[1]["id"]
+        )
+        self.assertEqual(rest, posts[2:])
+        self.assertEqual(self.export("posts", since=posts[0]["pub_date"]),
+                         posts)
+
+    def test_rejects_bad_watermark(self):
+        response = self.client.get(
+            reverse("api-v1:export-posts-list"), {"since": "вчера"},
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("since", json.loads(response.content))
+        for after_id in ("²", "9" * 23):
+            response = self.client.get(
+                reverse("api-v1:export-posts-list"),
+                {"since": "2020-01-01T00:00:00", "after_id": after_id},
+                HTTP_AUTHORIZATION=f"Token {self.token.key}",
+            )
+            self.assertEqual(response.status_code, 400)
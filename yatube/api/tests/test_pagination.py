@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ApiPaginationTest(TestCase):
+    """Тестирование курсорной пагинации API."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        group = Group.objects.create(title="Группа", slug="group")
+        for number in range(12):
+            author = User.objects.create_user(username=f"Author_{number}")
+            post = Post.objects.create(
+                text=f"пост {number}", author=author, group=group
+            )
+            Comment.objects.create(text="комментарий", author=author,
+                                   post=post)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_follow_cursor(self):
+        url = reverse("api-v1:posts-list")
+        first = self.client.get(
+            url, {"page_size": 5, "include": "comments"}
+        ).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(
+            [post["text"] for post in first["results"] + second["results"]],
+            [f"пост {number}" for number in range(11, 1, -1)],
+        )
+        self.assertEqual(
+            second["results"][0]["comments"][0]["text"], "комментарий"
+        )
+        self.assertIsNotNone(second["previous"])
+
+    def test_default_shape_is_unchanged(self):
+        """Без ?fields= и ?include= пост выглядит как раньше."""
+        post = self.client.get(
+            reverse("api-v1:posts-list"), {"page_size": 1}
+        ).json()["results"][0]
+        self.assertEqual(set(post), {
+            "id", "text", "pub_date", "author", "group", "image", "comments",
+        })
+        self.assertEqual(post["group"], Group.objects.get().pk)
+        self.assertEqual(post["comments"], ["комментарий"])
+        response = self.client.get(
+            reverse("api-v1:posts-list"), {"group": "²"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sparse_fields_and_includes(self):
+        url = reverse("api-v1:posts-list")
+        with CaptureQueriesContext(connection) as queries:
+            post = self.client.get(url, {"fields": "id,text"}).json()[
+                "results"
+            ][0]
+        self.assertEqual(set(post), {"id", "text"})
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        for table in ("auth_user", "posts_group", "posts_comment"):
+            self.assertNotIn(table, sql)
+        post = self.client.get(
+            url, {"fields": "id,author", "include": "group"}
+        ).json()["results"][0]
+        self.assertEqual(set(post), {"id", "author", "group"})
+        self.assertEqual(post["group"]["slug"], "group")
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        url = reverse("api-v1:posts-list")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, {"page_size": 2})
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url, {"page_size": 12})
+        self.assertEqual(len(small), len(large))
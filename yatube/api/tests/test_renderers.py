@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ApiStreamTest(TestCase):
+    """Тестирование потоковой выдачи списков API."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        group = Group.objects.create(title="Группа", slug="group")
+        for number in range(12):
+            author = User.objects.create_user(username=f"Author_{number}")
+            post = Post.objects.create(
+                text=f"пост {number}", author=author, group=group
+            )
+            Comment.objects.create(text="комментарий", author=author,
+                                   post=post)
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch("api.renderers.STREAM_CHUNK_SIZE", 5)
+    def test_stream_returns_whole_list(self):
+        response = self.client.get(
+            reverse("api-v1:posts-list"),
+            {"stream": 1, "fields": "text", "include": "comments"},
+        )
+        posts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            [post["text"] for post in posts],
+            [f"пост {number}" for number in range(11, -1, -1)],
+        )
+        self.assertEqual(posts[-1]["comments"][0]["text"], "комментарий")
+
+    @mock.patch("api.renderers.STREAM_CHUNK_SIZE", 5)
+    def test_stream_reads_chunks_by_key(self):
+        """Каждый кусок — свой запрос по ключу, курсор не держится."""
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        response = self.client.get(
+            reverse("api-v1:posts-list"), {"stream": 1, "fields": "id"}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            posts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            [post["id"] for post in posts],
+            list(Post.objects.order_by("-pk").values_list("pk", flat=True)),
+        )
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if "LIMIT 5" in query["sql"]
+        ]), 3)
+
+    @mock.patch("api.renderers.STREAM_CHUNK_SIZE", 2)
+    def test_stream_search_keeps_rank_order(self):
+        Post.objects.filter(text="пост 3").update(text="пост пост 3")
+        url = reverse("api-v1:posts-list")
+        expected = [post["text"] for post in self.client.get(
+            url, {"search": "пост", "page_size": 20}
+        ).json()["results"]]
+        response = self.client.get(
+            url, {"search": "пост", "stream": 1, "fields": "text"}
+        )
+        posts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([post["text"] for post in posts], expected)
+        self.assertEqual(posts[0]["text"], "пост пост 3")
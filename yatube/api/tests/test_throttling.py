@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import User
+
+
+class ApiThrottleTest(TestCase):
+    """Тестирование вёдер токенов API."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tokens = [
+            Token.objects.create(
+                user=User.objects.create_user(username=f"Writer_{number}")
+            ).key
+            for number in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        rates = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {
+            "anon": "1/min", "posts_write": "2/min",
+        })
+        rates.start()
+        self.addCleanup(rates.stop)
+
+    def create_post(self, token):
+        return self.client.post(
+            reverse("api-v1:posts-list"), {"text": "пост"},
+            HTTP_AUTHORIZATION=f"Token {token}",
+        )
+
+    def test_write_bucket_per_token(self):
+        for _ in range(2):
+            self.assertEqual(self.create_post(self.tokens[0]).status_code,
+                             201)
+        response = self.create_post(self.tokens[0])
+        self.assertEqual(response.status_code, 429)
+        self.assertLessEqual(int(response["Retry-After"]), 30)
+        self.assertEqual(self.create_post(self.tokens[1]).status_code, 201)
+        response = self.client.get(
+            reverse("api-v1:posts-list"),
+            HTTP_AUTHORIZATION=f"Token {self.tokens[0]}",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_token_keeps_user_quota(self):
+        for _ in range(2):
+            self.create_post(self.tokens[0])
+        user = Token.objects.get(key=self.tokens[0]).user
+        response = self.client.post(
+            reverse("api-v1:posts-list"), {"text": "пост"},
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_forwarded_for_does_not_reset_ip_quota(self):
+        url = reverse("api-v1:posts-list")
+        response = self.client.get(url, HTTP_X_FORWARDED_FOR="1.2.3.4")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_X_FORWARDED_FOR="5.6.7.8")
+        self.assertEqual(response.status_code, 429)
+
+    def test_anonymous_bucket_per_ip(self):
+        url = reverse("api-v1:posts-list")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        response = self.client.get(url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 200)
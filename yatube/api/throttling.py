@@ -0,0 +1,102 @@
+"""Ограничение частоты запросов API вёдрами токенов в общем кеше.
+
+Запрос с входом списывает токен из ведра пользователя, а с токеном
+(JWT или Token) — ещё и из ведра токена, так что новый токен не даёт
+новой квоты. Имя предела пользователя берётся по throttle_scope
+представления: '<scope>' для чтения и '<scope>_write' для записи, а
+если такого предела нет, то 'api' и 'write'. Ведро токена общее для
+всех представлений и идёт по пределу 'token'. Анонимные запросы идут
+по пределу 'anon' на IP; IP берётся с учётом NUM_PROXIES, поэтому
+X-Forwarded-For от клиента не подменяет его.
+
+Предел '60/min' — ведро на 60 запросов, которое наполняется за минуту.
+Все вёдра запроса проверяются одним атомарным вызовом кеша
+(SQLiteCache.take_tokens), так что пределы общие для всех процессов
+сервера.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+READ_RATE = 'api'
+WRITE_RATE = 'write'
+ANON_RATE = 'anon'
+TOKEN_RATE = 'token'
+WRITE_SUFFIX = '_write'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'60/min' -> (мс на токен, ёмкость ведра в мс)."""
+    number, period = rate.split('/')
+    number = int(number)
+    interval = -(-PERIODS[period[0]] * 1000 // number)
+    return interval, interval * number
+
+
+def take_tokens(buckets) -> float:
+    """0, если токены взяты из всех вёдер (ключ, interval, burst),
+    иначе сколько секунд ждать."""
+    take = getattr(cache, 'take_tokens', None)
+    if take is not None:
+        return take(buckets)
+    # У кеша нет атомарной операции: предел приблизительный.
+    now = int(time.time() * 1000)
+    found = cache.get_many([key for key, _, _ in buckets])
+    fulls, wait = {}, 0
+    for key, interval, burst in buckets:
+        fulls[key] = max(found.get(key, 0), now) + interval
+        if fulls[key] - now > burst:
+            wait = max(wait, fulls[key] - burst - now)
+    if wait:
+        return wait / 1000
+    for key, full in fulls.items():
+        cache.set(key, full, -(-(full - now) // 1000))
+    return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ведро токенов на клиента и предел (см. описание модуля)."""
+
+    cache_format = 'throttle_%s_%s'
+
+    def get_rate_name(self, request, view) -> str:
+        if not (request.user and request.user.is_authenticated):
+            return ANON_RATE
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        scope = getattr(view, 'throttle_scope', None)
+        if request.method in SAFE_METHODS:
+            name, default = scope, READ_RATE
+        else:
+            name, default = scope and scope + WRITE_SUFFIX, WRITE_RATE
+        return name if name in rates else default
+
+    def get_buckets(self, request, view):
+        """(имя предела, клиент) для всех вёдер запроса."""
+        name = self.get_rate_name(request, view)
+        if not (request.user and request.user.is_authenticated):
+            return [(name, 'ip_' + self.get_ident(request))]
+        buckets = [(name, f'user_{request.user.pk}')]
+        if request.auth is not None:
+            token = getattr(request.auth, 'key', None) or str(request.auth)
+            buckets.append((TOKEN_RATE, 'token_' + hashlib.sha256(
+                token.encode()
+            ).hexdigest()[:32]))
+        return buckets
+
+    def allow_request(self, request, view):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        buckets = [
+            (self.cache_format % (name, client), *parse_rate(rates[name]))
+            for name, client in self.get_buckets(request, view)
+            if rates.get(name) is not None
+        ]
+        self.delay = take_tokens(buckets) if buckets else 0
+        return not self.delay
+
+    def wait(self):
+        return self.delay
@@ -3,8 +3,9 @@ from django.urls import include, path
 from rest_framework import routers
 from rest_framework.authtoken import views
 
-from .views import (CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet,
-                    UserViewSet)
+from .views import (ChangeViewSet, CommentExportViewSet, CommentViewSet,
+                    FollowExportViewSet, FollowViewSet, GroupViewSet,
+                    PostExportViewSet, PostViewSet, UserViewSet)
 
 app_name = 'api-v1'
 
@@ -15,6 +16,12 @@ router.register(r'groups', GroupViewSet, basename='groups')
 router.register(r'users', UserViewSet, basename='users')
 router.register(r'posts/(?P<post_id>\d+)/comments',
                 CommentViewSet, basename='comments')
+router.register(r'changes', ChangeViewSet, basename='changes')
+router.register(r'export/posts', PostExportViewSet, basename='export-posts')
+router.register(r'export/comments', CommentExportViewSet,
+                basename='export-comments')
+router.register(r'export/follows', FollowExportViewSet,
+                basename='export-follows')
 
 urlpatterns = [
     path('v1/', include(router.urls)),
@@ -1,34 +1,88 @@
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from . import export
+from .mixins import (ConditionalListMixin, SparseFieldsViewMixin,
+                     StreamingListMixin)
+from .pagination import KeysetPagination, RankedPagination
+from .params import parse_id
 from .permissions import IsAuthorOrReadOnly
+from .renderers import NDJSONRenderer
 from .serializers import (CommentSerializer, FollowSerializer, GroupSerializer,
                           PostSerializer, UserSerializer)
-from posts.models import Follow, Group, Post, User
+from posts import changes, page_cache, search
+from posts.models import Comment, Follow, Group, Post, User
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ConditionalListMixin, StreamingListMixin,
+                  SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = (IsAuthorOrReadOnly,)
+    throttle_scope = 'posts'
+    related_fields = {'author': 'author'}
+    prefetch_fields = {'comments': 'comments'}
+    select_includes = {'group': 'group'}
+    prefetch_includes = {'comments': Prefetch(
+        'comments', queryset=Comment.objects.select_related('author')
+    )}
+
+    @property
+    def paginator(self):
+        """Результаты поиска идут по релевантности и листаются по
+        номерам страниц, остальные списки — курсором по дате."""
+        if not hasattr(self, '_paginator'):
+            if 'search' in self.request.query_params:
+                self._paginator = RankedPagination()
+            else:
+                self._paginator = KeysetPagination()
+        return self._paginator
+
+    def get_queryset(self):
+        """В списке ?search= ищет по тексту (FTS5, по релевантности),
+        ?group= и ?author= сужают выборку."""
+        posts = super().get_queryset()
+        if self.action != 'list':
+            return posts
+        params = self.request.query_params
+        group_id = parse_id(params.get('group'))
+        if group_id is not None:
+            posts = posts.filter(group_id=group_id)
+        if params.get('author'):
+            posts = posts.filter(author__username=params['author'])
+        if 'search' in params:
+            posts = search.search(params['search'], posts)
+        return posts
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ConditionalListMixin, StreamingListMixin,
+                  SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    list_markers = (page_cache.USERS,)
 
 
-class FollowViewSet(viewsets.ModelViewSet):
+class FollowViewSet(ConditionalListMixin, StreamingListMixin,
+                    SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = FollowSerializer
     permission_classes = (IsAuthenticated,)
+    related_fields = {'user': 'user', 'author': 'author'}
     filter_backends = (filters.SearchFilter,)
     search_fields = ('user__username', 'author__username',)
 
+    def get_list_markers(self):
+        return (page_cache.profile_version_name(self.request.user.pk),)
+
     def get_queryset(self):
         return Follow.objects.filter(user__username=self.request.user.username)
 
@@ -36,16 +90,22 @@ class FollowViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ConditionalListMixin, SparseFieldsViewMixin,
+                   viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     http_method_names = ('get', 'head',)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalListMixin, SparseFieldsViewMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrReadOnly,)
+    throttle_scope = 'comments'
+    pagination_class = KeysetPagination
+    cursor_key_field = 'created'
+    related_fields = {'author': 'author'}
 
     def get_queryset(self):
         post = get_object_or_404(Post, id=self.kwargs.get('post_id'))
@@ -53,3 +113,75 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+
+
+class ExportViewSet(viewsets.GenericViewSet):
+    """Потоковая NDJSON-выгрузка всех строк модели (см. api.export)."""
+
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (NDJSONRenderer,)
+    throttle_scope = 'export'
+    key_field = 'pub_date'
+    related_fields = ()
+    prefetch_fields = ()
+
+    def list(self, request):
+        since, after_id = export.parse_watermark(request.query_params)
+        queryset = self.get_queryset().select_related(
+            *self.related_fields
+        ).prefetch_related(*self.prefetch_fields)
+        return StreamingHttpResponse(
+            export.export_lines(queryset, self.key_field,
+                                self.get_serializer_class(), since, after_id),
+            content_type=NDJSONRenderer.media_type,
+        )
+
+
+class PostExportViewSet(ExportViewSet):
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    related_fields = ('author',)
+    prefetch_fields = ('comments',)
+
+
+class CommentExportViewSet(ExportViewSet):
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    key_field = 'created'
+    related_fields = ('author',)
+
+
+class FollowExportViewSet(ExportViewSet):
+    queryset = Follow.objects.all()
+    serializer_class = FollowSerializer
+    key_field = 'created'
+    related_fields = ('user', 'author')
+
+
+class ChangeViewSet(viewsets.GenericViewSet):
+    """Что изменилось после ?cursor= (см. posts.changes).
+
+    Без курсора отдаёт только текущий курсор: с него клиент начинает
+    после полной загрузки. Если журнал после курсора уже обрезан,
+    ответ 410, и клиенту нужна полная загрузка заново.
+    """
+
+    EXPIRED = 'Журнал изменений обрезан; нужна полная синхронизация.'
+    BAD_CURSOR = 'Ожидается целое число.'
+
+    def list(self, request):
+        cursor = request.query_params.get('cursor')
+        if cursor is None:
+            return Response({
+                'cursor': changes.latest(), 'more': False, 'changes': {},
+            })
+        cursor = parse_id(cursor)
+        if cursor is None:
+            raise ValidationError({'cursor': self.BAD_CURSOR})
+        if changes.is_expired(cursor):
+            return Response({'detail': self.EXPIRED},
+                            status=status.HTTP_410_GONE)
+        sections, cursor, more = changes.since(
+            cursor, request.user.pk, settings.CHANGES_PAGE_SIZE
+        )
+        return Response({'cursor': cursor, 'more': more, 'changes': sections})
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Message, Post
+from . import search
+from .models import Comment, Conversation, Follow, Group, Message, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +10,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексу FTS5 вместо LIKE по всей таблице."""
+        if not search_term:
+            return queryset, False
+        return search.search(search_term, queryset), False
+
 
 class MessageAdmin(admin.ModelAdmin):
     list_display = ('text', 'dispatched', 'author',)
@@ -17,8 +24,15 @@ class MessageAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('first_user', 'second_user', 'last_message_at',
+                    'first_unread', 'second_unread')
+    list_select_related = ('first_user', 'second_user')
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Message, MessageAdmin)
 admin.site.register(Follow)
+admin.site.register(Conversation, ConversationAdmin)
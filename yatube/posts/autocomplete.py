@@ -0,0 +1,87 @@
+from django.urls import reverse
+
+from .models import AutocompleteEntry
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_PREFIX_LENGTH = 100
+# Символ больше любого, который встречается в ключах: верхняя граница
+# диапазона ключей с данным префиксом.
+KEY_UPPER_BOUND = '\U0010ffff'
+
+
+def user_entries(user) -> list:
+    label = user.get_full_name() or user.username
+    return [AutocompleteEntry(
+        key=user.username.lower(), kind=AutocompleteEntry.USER,
+        object_id=user.pk, name=user.username, label=label,
+    )]
+
+
+def group_entries(group) -> list:
+    """Группа ищется и по адресу, и по названию."""
+    return [
+        AutocompleteEntry(
+            key=key, kind=AutocompleteEntry.GROUP, object_id=group.pk,
+            name=group.slug, label=group.title,
+        )
+        for key in sorted({group.slug.lower(), group.title.lower()})
+    ]
+
+
+def _fields(entry) -> tuple:
+    return entry.key, entry.name, entry.label
+
+
+def update(kind, object_id, entries):
+    """Заменяет строки объекта, если они изменились.
+
+    Пользователь сохраняется при каждом входе, поэтому неизменные
+    строки не переписываются.
+    """
+    current = AutocompleteEntry.objects.filter(kind=kind, object_id=object_id)
+    if sorted(map(_fields, current)) == sorted(map(_fields, entries)):
+        return
+    current.delete()
+    AutocompleteEntry.objects.bulk_create(entries)
+
+
+def user_changed(user):
+    update(AutocompleteEntry.USER, user.pk, user_entries(user))
+
+
+def group_changed(group):
+    update(AutocompleteEntry.GROUP, group.pk, group_entries(group))
+
+
+def forget(kind, object_id):
+    AutocompleteEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def complete(prefix, limit=AUTOCOMPLETE_LIMIT) -> list:
+    """Подсказки для префикса в алфавитном порядке ключей.
+
+    Группа, у которой префикс подходит и к адресу, и к названию,
+    показывается один раз.
+    """
+    prefix = prefix.strip().lower()[:MAX_PREFIX_LENGTH]
+    if not prefix:
+        return []
+    entries = AutocompleteEntry.objects.filter(
+        key__gte=prefix, key__lt=prefix + KEY_UPPER_BOUND
+    ).order_by('key')[:limit * 2]
+    results, seen = [], set()
+    for entry in entries:
+        if (entry.kind, entry.object_id) in seen:
+            continue
+        seen.add((entry.kind, entry.object_id))
+        if entry.kind == AutocompleteEntry.USER:
+            url = reverse('posts:profile', args=(entry.name,))
+        else:
+            url = reverse('posts:group_posts', args=(entry.name,))
+        results.append({
+            'type': entry.kind, 'name': entry.name, 'label': entry.label,
+            'url': url,
+        })
+        if len(results) == limit:
+            break
+    return results
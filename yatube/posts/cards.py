@@ -0,0 +1,140 @@
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from . import thumbnails
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+CARD_TEMPLATE = 'posts/card_post_body.html'
+
+
+def _post_version_key(post_id) -> str:
+    return f'post_card_version_{post_id}'
+
+
+def _group_version_key(group_id) -> str:
+    return f'group_card_version_{group_id}'
+
+
+def _author_version_key(author_id) -> str:
+    return f'author_card_version_{author_id}'
+
+
+def _new_version() -> int:
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump_post(post_id):
+    """Делает устаревшей закешированную карточку поста."""
+    _bump(_post_version_key(post_id))
+
+
+def bump_group(group_id):
+    """Делает устаревшими карточки всех постов группы."""
+    _bump(_group_version_key(group_id))
+
+
+def bump_author(author_id):
+    """Делает устаревшими карточки всех постов автора: в карточке его
+    имя и ссылка на профиль."""
+    _bump(_author_version_key(author_id))
+
+
+def remember_username(user, update_fields=None):
+    """Запоминает имя пользователя, сохранённое в базе (до save).
+
+    Сохранение, не трогающее username (например, last_login при входе),
+    лишнего запроса не делает.
+    """
+    user.stored_username = user.username
+    if user._state.adding or (
+        update_fields is not None and 'username' not in update_fields
+    ):
+        return
+    user.stored_username = type(user).objects.filter(
+        pk=user.pk
+    ).values_list('username', flat=True).first()
+
+
+def is_renamed(user) -> bool:
+    """Имя пользователя сменилось при последнем save."""
+    return getattr(user, 'stored_username', user.username) != user.username
+
+
+def _versions(keys) -> dict:
+    """Версии по ключам одним get_many.
+
+    Потерянная (вытесненная) версия заменяется новой, чтобы не отдать
+    карточку, закешированную до последнего изменения.
+    """
+    found = cache.get_many(keys)
+    for key in keys - found.keys():
+        version = _new_version()
+        cache.add(key, version, None)
+        found[key] = cache.get(key, version)
+    return found
+
+
+def versions(posts) -> dict:
+    """Версии постов, их групп и авторов одним get_many."""
+    keys = {_post_version_key(post.pk) for post in posts}
+    keys |= {_author_version_key(post.author_id) for post in posts}
+    keys |= {_group_version_key(post.group_id) for post in posts
+             if post.group_id}
+    return _versions(keys)
+
+
+def author_version(author_id) -> int:
+    """Версия карточек автора: сдвигается, когда он сменил имя."""
+    key = _author_version_key(author_id)
+    return _versions({key})[key]
+
+
+def card_key(post, found_versions) -> str:
+    """Ключ карточки: id и дата поста плюс версии поста, автора и группы.
+
+    Дата публикации защищает от повторно выданного id.
+    """
+    key = (f'post_card_{post.pk}_{post.pub_date.timestamp()}_'
+           f'{found_versions[_post_version_key(post.pk)]}_'
+           f'{found_versions[_author_version_key(post.author_id)]}')
+    if post.group_id:
+        key += f'_{found_versions[_group_version_key(post.group_id)]}'
+    return key
+
+
+def prefetch(posts):
+    """Достаёт карточки страницы из кеша: два get_many на страницу.
+
+    Для карточек, которые придётся рисовать, заранее достаются готовые
+    миниатюры.
+    """
+    posts = list(posts)
+    found_versions = versions(posts)
+    for post in posts:
+        post.card_key = card_key(post, found_versions)
+    bodies = cache.get_many([post.card_key for post in posts])
+    for post in posts:
+        post.card_body = bodies.get(post.card_key)
+    thumbnails.prefetch(post for post in posts if post.card_body is None)
+
+
+def render_body(post) -> str:
+    """Общая для всех зрителей часть карточки, из кеша или заново."""
+    if not hasattr(post, 'card_key'):
+        prefetch([post])
+    if post.card_body is None:
+        post.card_body = render_to_string(CARD_TEMPLATE, {'post': post})
+        # Карточка с заглушкой не кешируется: иначе при сбое нарезки
+        # заглушка осталась бы на CARD_CACHE_TIMEOUT.
+        if not thumbnails.pending(post.image):
+            cache.set(post.card_key, post.card_body, CARD_CACHE_TIMEOUT)
+    return post.card_body
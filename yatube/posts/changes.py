@@ -0,0 +1,81 @@
+"""Журнал изменений для синхронизации клиентов: что изменилось после
+курсора.
+
+Сигналы пишут строку на каждое создание, изменение и удаление поста,
+комментария и подписки в той же транзакции, что и само изменение, так
+что удаления из delete_post, delete_comment, API и каскадные удаления
+попадают в журнал одинаково. Курсор — id строки журнала. SQLite пишет
+одной транзакцией за раз, поэтому строки становятся видны в порядке id,
+и клиент не перескакивает через ещё не закоммиченные. Выборка идёт по
+первичному ключу от курсора и стоит O(изменений), а не O(данных).
+"""
+from django.db.models import Q
+
+from .models import Change, Comment, Follow, Post
+
+KINDS = {Post: Change.POST, Comment: Change.COMMENT, Follow: Change.FOLLOW}
+# id первой строки журнала (AUTOINCREMENT начинает с 1).
+FIRST_ID = 1
+# Имена разделов ответа по типам журнала.
+SECTIONS = {Change.POST: 'posts', Change.COMMENT: 'comments',
+            Change.FOLLOW: 'follows'}
+
+
+def record(instance, action):
+    Change.objects.create(
+        kind=KINDS[type(instance)], object_id=instance.pk, action=action,
+        follower_id=getattr(instance, 'user_id', None)
+        if isinstance(instance, Follow) else None,
+    )
+
+
+def latest() -> int:
+    """Курсор, с которого начинает клиент после полной загрузки."""
+    return Change.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def is_expired(cursor) -> bool:
+    """Строки после курсора могли быть удалены prune_changes.
+
+    Курсор — id строки, которая была в журнале, а prune_changes всегда
+    оставляет самую новую строку. Поэтому курсор младше самой старой
+    оставшейся строки значит, что его строка обрезана, и с ней, возможно,
+    следующие. Сравнение не полагается на то, что id идут подряд. Курсор
+    0 выдаётся при пустом журнале и годен, пока цела первая его строка.
+    """
+    oldest = Change.objects.order_by('id').values_list(
+        'id', flat=True
+    ).first()
+    if oldest is None or cursor >= oldest:
+        return False
+    return cursor > 0 or oldest > FIRST_ID
+
+
+def since(cursor, user_id, limit):
+    """Изменения после курсора: (разделы, новый курсор, есть ли ещё).
+
+    Несколько изменений одного объекта сворачиваются в последнее;
+    созданный и затем изменённый объект остаётся созданным.
+    """
+    rows = list(Change.objects.filter(id__gt=cursor).filter(
+        ~Q(kind=Change.FOLLOW) | Q(follower_id=user_id)
+    ).order_by('id').values_list(
+        'id', 'kind', 'object_id', 'action'
+    )[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    actions = {}
+    for _, kind, object_id, action in rows:
+        if actions.get((kind, object_id)) == Change.CREATED:
+            if action == Change.UPDATED:
+                continue
+        actions[kind, object_id] = action
+    sections = {
+        section: {action: [] for action, _ in Change.ACTIONS}
+        for section in SECTIONS.values()
+    }
+    for (kind, object_id), action in actions.items():
+        sections[SECTIONS[kind]][action].append(object_id)
+    return sections, rows[-1][0] if rows else cursor, more
@@ -0,0 +1,81 @@
+"""ETag страниц по дешёвым маркерам изменений.
+
+Маркер — версия из кеша, которую сигналы сдвигают при каждом изменении
+того, что видно на странице. Если версии не сдвинулись, ответ 304
+отдаётся без выборки постов и отрисовки шаблонов.
+"""
+import hashlib
+
+from django.middleware.csrf import get_token
+
+from . import cards, page_cache
+from .models import Post, User
+
+
+def make_etag(request, *markers) -> str:
+    """ETag из адреса с параметрами, зрителя и маркеров."""
+    viewer = (request.user.pk if request.user.is_authenticated
+              else 'anonymous')
+    raw = '|'.join(
+        str(part) for part in (request.get_full_path(), viewer, *markers)
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _viewer_profile(request):
+    """Версия профиля зрителя: от неё зависит кнопка подписки."""
+    if request.user.is_authenticated:
+        return page_cache.profile_version_name(request.user.pk)
+    return page_cache.FEED
+
+
+def feed_etag(request, *args, **kwargs) -> str:
+    """Версия ленты сдвигается и при смене имени автора: оно в
+    карточках."""
+    return make_etag(request, *page_cache.versions(page_cache.FEED))
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return make_etag(
+        request, cards.author_version(author_id), *page_cache.versions(
+            page_cache.FEED, page_cache.profile_version_name(author_id),
+            _viewer_profile(request),
+        ),
+    )
+
+
+def _csrf_secret(request) -> str:
+    """Секрет CSRF зрителя, которому страница рисует форму.
+
+    Форма в странице из 304 несёт старый токен; если секрет с тех пор
+    сменился (например, при входе), её отправка получила бы 403.
+    get_token создаёт секрет, если его ещё нет, так что ETag первого
+    ответа совпадает со следующими.
+    """
+    if not request.user.is_authenticated:
+        return ''
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def post_etag(request, username, post_id):
+    """Версии карточки поста покрывают его правки, комментарии и имя
+    автора, а секрет CSRF — токен в форме комментария."""
+    post = Post.objects.filter(
+        id=post_id, author__username=username
+    ).only('id', 'group_id', 'author_id').first()
+    if post is None:
+        return None
+    found = cards.versions([post])
+    return make_etag(
+        request, _csrf_secret(request), *sorted(found.items()),
+        *page_cache.versions(
+            page_cache.profile_version_name(post.author_id),
+            _viewer_profile(request),
+        ),
+    )
@@ -0,0 +1,127 @@
+from django.db.models import Case, F, When
+
+from .models import Conversation, Message
+from .paginators import CursorPaginator, MergedCursorPaginator
+
+
+def ordered_pair(user_id, partner_id) -> tuple:
+    """Ключ диалога: id участников по возрастанию."""
+    return min(user_id, partner_id), max(user_id, partner_id)
+
+
+def get(user_id, partner_id):
+    """Диалог пары или None, если они ещё не переписывались."""
+    first, second = ordered_pair(user_id, partner_id)
+    return Conversation.objects.filter(
+        first_user_id=first, second_user_id=second
+    ).first()
+
+
+def thread_paginator(user_id, partner_id, per_page) -> MergedCursorPaginator:
+    """Переписка пары от новых сообщений к старым.
+
+    Каждое направление читается по своему индексу (отправитель,
+    получатель, dispatched), и страница сливается из двух проходов,
+    так что переписка открывается за одинаковое время при любом объёме
+    входящих.
+    """
+    messages = Message.objects.select_related('author', 'user')
+    return MergedCursorPaginator([
+        CursorPaginator(
+            messages.filter(author_id=user_id, user_id=partner_id),
+            per_page, key_field='dispatched',
+        ),
+        CursorPaginator(
+            messages.filter(author_id=partner_id, user_id=user_id),
+            per_page, key_field='dispatched',
+        ),
+    ], per_page, key_field='dispatched')
+
+
+def _unread_field(conversation_pair, user_id) -> str:
+    first, _ = conversation_pair
+    return 'first_unread' if user_id == first else 'second_unread'
+
+
+def message_added(message) -> bool:
+    """Учитывает новое сообщение в диалоге пары.
+
+    Возвращает True, если сообщение открыло новый диалог.
+    """
+    pair = ordered_pair(message.author_id, message.user_id)
+    conversation, created = Conversation.objects.get_or_create(
+        first_user_id=pair[0], second_user_id=pair[1],
+        defaults={'last_message_at': message.dispatched},
+    )
+    changes = {
+        'last_message': message, 'last_message_at': message.dispatched,
+    }
+    if message.author_id != message.user_id:
+        unread = _unread_field(pair, message.user_id)
+        changes[unread] = F(unread) + 1
+    Conversation.objects.filter(pk=conversation.pk).update(**changes)
+    return created
+
+
+def message_deleted(message) -> bool:
+    """Убирает сообщение из диалога пары.
+
+    Последнее сообщение ищется заново; диалог без сообщений удаляется,
+    и тогда возвращается True. Прочитано ли удалённое сообщение, не
+    хранится, поэтому счётчик получателя просто уменьшается, пока он
+    больше нуля.
+    """
+    pair = ordered_pair(message.author_id, message.user_id)
+    conversations = Conversation.objects.filter(
+        first_user_id=pair[0], second_user_id=pair[1]
+    )
+    last = next(iter(thread_paginator(*pair, 1).get_page()), None)
+    if last is None:
+        return conversations.delete()[0] > 0
+    changes = {'last_message': last, 'last_message_at': last.dispatched}
+    if message.author_id != message.user_id:
+        unread = _unread_field(pair, message.user_id)
+        changes[unread] = Case(
+            When(**{f'{unread}__gt': 0}, then=F(unread) - 1),
+            default=F(unread),
+        )
+    conversations.update(**changes)
+    return False
+
+
+def mark_read(conversation, user_id):
+    """Обнуляет непрочитанные пользователя, если они есть."""
+    unread = _unread_field(
+        (conversation.first_user_id, conversation.second_user_id), user_id
+    )
+    if getattr(conversation, unread):
+        Conversation.objects.filter(pk=conversation.pk).update(**{unread: 0})
+        setattr(conversation, unread, 0)
+
+
+def inbox_paginator(user, per_page) -> MergedCursorPaginator:
+    """Диалоги пользователя от свежих к старым.
+
+    Пользователь бывает первым или вторым участником, поэтому страница
+    сливается из двух проходов по индексам (участник, last_message_at).
+    """
+    conversations = Conversation.objects.select_related(
+        'first_user', 'second_user', 'last_message'
+    )
+    return MergedCursorPaginator([
+        CursorPaginator(
+            conversations.filter(first_user=user), per_page,
+            key_field='last_message_at',
+        ),
+        CursorPaginator(
+            conversations.filter(second_user=user), per_page,
+            key_field='last_message_at',
+        ),
+    ], per_page, key_field='last_message_at')
+
+
+def prepare(page, user_id):
+    """Проставляет собеседника и непрочитанные для шаблона."""
+    for conversation in page:
+        conversation.partner = conversation.partner_of(user_id)
+        conversation.unread = conversation.unread_for(user_id)
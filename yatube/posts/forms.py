@@ -1,9 +1,31 @@
+from django import forms
 from django.forms import ModelForm
 
-from .models import Comment, Post, Message
+from . import uploads
+from .models import Comment, Group, Post, Message
 
 
-class PostForm(ModelForm):
+class ImageFormMixin:
+    """Пределы и нормализация загруженной картинки (posts.uploads)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.oversized_image = self.files.get('image')
+        if self.oversized_image and uploads.is_too_large(
+            self.oversized_image
+        ):
+            self.files = self.files.copy()
+            self.files.pop('image')
+        else:
+            self.oversized_image = None
+
+    def clean_image(self):
+        if self.oversized_image:
+            uploads.check_size(self.oversized_image)
+        return uploads.clean_image(self.cleaned_data['image'])
+
+
+class PostForm(ImageFormMixin, ModelForm):
     """Форма для постов."""
 
     class Meta:
@@ -19,9 +41,23 @@ class CommentForm(ModelForm):
         fields = ('text',)    
 
 
-class MessageForm(ModelForm):
+class MessageForm(ImageFormMixin, ModelForm):
     """Форма для сообщений."""
 
     class Meta:
         model = Message
         fields = ('text', 'image',)
+
+
+class SearchForm(forms.Form):
+    """Форма для поиска по постам."""
+
+    q = forms.CharField(
+        label='Запрос', required=False, max_length=200,
+        help_text='Слова ищутся целиком, «слово*» — по началу слова.'
+    )
+    group = forms.ModelChoiceField(
+        label='Группа', queryset=Group.objects.all(), required=False,
+        to_field_name='slug'
+    )
+    author = forms.CharField(label='Автор', required=False, max_length=150)
@@ -0,0 +1,64 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import autocomplete
+from posts.models import AutocompleteEntry
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку подсказок по префиксу: p50 и p99 в '
+        'миллисекундах. Строки индекса создаются во временной транзакции '
+        'и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with transaction.atomic():
+            names = self.fill(options['users'], rng)
+            for length in (1, 2, 3, 5):
+                timings = sorted(
+                    self.measure(rng.choice(names)[:length])
+                    for _ in range(options['queries'])
+                )
+                p50 = timings[len(timings) // 2]
+                p99 = timings[int(len(timings) * 0.99)]
+                self.stdout.write(
+                    f'префикс {length}: p50 {p50 * 1000:6.2f} мс, '
+                    f'p99 {p99 * 1000:6.2f} мс'
+                )
+            transaction.set_rollback(True)
+
+    def fill(self, total, rng):
+        names = []
+        alphabet = string.ascii_lowercase + string.digits
+        for start in range(0, total, BATCH_SIZE):
+            batch = [
+                ''.join(rng.choices(alphabet, k=rng.randint(4, 12)))
+                for _ in range(start, min(start + BATCH_SIZE, total))
+            ]
+            AutocompleteEntry.objects.bulk_create(
+                AutocompleteEntry(
+                    key=name, kind=AutocompleteEntry.USER,
+                    object_id=start + number, name=name, label=name,
+                )
+                for number, name in enumerate(batch)
+            )
+            names.extend(batch)
+        return names
+
+    @staticmethod
+    def measure(prefix):
+        start = time.perf_counter()
+        autocomplete.complete(prefix)
+        return time.perf_counter() - start
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from yatube.sqlite_cache import SQLiteCache
+
+BENCHMARK_TABLE = 'cache_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает SQLiteCache с LocMemCache и DatabaseCache: set, get, '
+        'get_many, set_many и incr, в микросекундах на операцию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        keys = [f'key_{number}' for number in range(options['keys'])]
+        params = {'OPTIONS': {'MAX_ENTRIES': len(keys) * 2}}
+        call_command('createcachetable', BENCHMARK_TABLE, verbosity=0)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                backends = (
+                    ('locmem', LocMemCache('cache_benchmark', params)),
+                    ('database', DatabaseCache(BENCHMARK_TABLE, params)),
+                    ('sqlite', SQLiteCache(
+                        os.path.join(directory, 'cache.sqlite3'), params
+                    )),
+                )
+                for name, backend in backends:
+                    self.report(name, self.measure(backend, keys))
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE {BENCHMARK_TABLE}')
+
+    def measure(self, backend, keys):
+        """Замеры на отдельном экземпляре кеша, не на кеше сервера."""
+        value = {'text': 'пост' * 50, 'id': 1}
+        chunks = [keys[start:start + 10] for start in range(0, len(keys), 10)]
+        timings = {}
+
+        def timed(name, operation, count):
+            start = time.perf_counter()
+            operation()
+            timings[name] = (time.perf_counter() - start) / count * 10 ** 6
+
+        timed('set', lambda: [backend.set(key, value) for key in keys],
+              len(keys))
+        timed('get', lambda: [backend.get(key) for key in keys], len(keys))
+        timed('set_many x10', lambda: [
+            backend.set_many(dict.fromkeys(chunk, value)) for chunk in chunks
+        ], len(chunks))
+        timed('get_many x10',
+              lambda: [backend.get_many(chunk) for chunk in chunks],
+              len(chunks))
+        backend.set('counter', 0)
+        timed('incr', lambda: [backend.incr('counter') for _ in keys],
+              len(keys))
+        backend.clear()
+        return timings
+
+    def report(self, name, timings):
+        self.stdout.write(f'{name:>9}: ' + ', '.join(
+            f'{operation} {micros:.1f} мкс'
+            for operation, micros in timings.items()
+        ))
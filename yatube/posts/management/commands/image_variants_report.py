@@ -0,0 +1,72 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+from posts.storage import media_storage
+
+# Прежняя единственная миниатюра карточки: JPEG с качеством sorl по
+# умолчанию.
+BASELINE = ('960x339', {'crop': 'center', 'upscale': True,
+                        'format': 'JPEG', 'quality': 95})
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает объём вариантов миниатюры карточки для картинок постов '
+        'и сравнивает его с прежней миниатюрой 960x339 JPEG. Варианты '
+        'кодируются в памяти, хранилище не меняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='posts')
+        parser.add_argument('--limit', type=int, default=100)
+
+    def handle(self, *args, **options):
+        names = self.image_names(options['directory'], options['limit'])
+        if not names:
+            self.stdout.write('Картинок не найдено')
+            return
+        variants = list(thumbnails.variants('card'))
+        baseline, totals = 0, dict.fromkeys(
+            ((format_, width) for format_, width, _, _ in variants), 0
+        )
+        for name in names:
+            source = ImageFile(name, media_storage)
+            image = default.engine.get_image(source)
+            geometry, geometry_options = BASELINE
+            baseline += len(thumbnails.backend.encode(
+                name, image, geometry, **geometry_options
+            ))
+            for format_, width, geometry, geometry_options in variants:
+                totals[format_, width] += len(thumbnails.backend.encode(
+                    name, image, geometry, **geometry_options
+                ))
+        self.stdout.write(f'Картинок: {len(names)}')
+        self.stdout.write(
+            f'{"960 JPEG q95":>14}: {baseline / len(names) / 1024:8.1f} КБ'
+        )
+        for (format_, width), total in totals.items():
+            saving = 100 * (1 - total / baseline)
+            self.stdout.write(
+                f'{f"{width} {format_}":>14}: '
+                f'{total / len(names) / 1024:8.1f} КБ, '
+                f'экономия {saving:5.1f}%'
+            )
+
+    def image_names(self, directory, limit):
+        root = os.path.join(settings.MEDIA_ROOT, directory)
+        names = []
+        for path, _, files in os.walk(root):
+            for file_name in sorted(files):
+                if file_name.startswith('.'):
+                    continue
+                names.append(os.path.relpath(
+                    os.path.join(path, file_name), settings.MEDIA_ROOT
+                ))
+                if len(names) == limit:
+                    return names
+        return names
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из журнала изменений строки старше --days дней. Клиенты '
+        'с курсором старше журнала получат 410 и загрузят всё заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_LOG_RETENTION_DAYS
+        )
+
+    def handle(self, *args, **options):
+        boundary = timezone.now() - timedelta(days=options['days'])
+        # Последняя строка остаётся всегда: курсор на неё остаётся
+        # действительным (posts.changes.is_expired).
+        newest = Change.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first()
+        deleted, _ = Change.objects.filter(
+            created__lt=boundary
+        ).exclude(id=newest).delete()
+        self.stdout.write(f'Удалено строк журнала: {deleted}')
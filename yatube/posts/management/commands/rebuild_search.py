@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздаёт триггеры поиска и перестраивает индекс FTS5 или '
+        'проверяет их (--check).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить триггеры и индекс, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            search.rebuild()
+            self.stdout.write('Индекс поиска перестроен')
+            return
+        missing = search.missing_triggers()
+        if missing:
+            raise CommandError(
+                f'Нет триггеров поиска: {", ".join(missing)}'
+            )
+        if not search.index_is_consistent():
+            raise CommandError('Индекс поиска расходится с постами')
+        self.stdout.write('Индекс поиска в порядке')
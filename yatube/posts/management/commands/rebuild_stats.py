@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import stats
+from posts.models import User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики профилей или проверяет их (--check).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сравнить счётчики с данными, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        users = User.objects.values_list('pk', 'username')
+        for user_id, username in users.iterator():
+            current = UserStats.objects.filter(user_id=user_id).first()
+            expected = stats.compute(user_id)
+            differs = {
+                name: (getattr(current, name, None), value)
+                for name, value in expected.items()
+                if getattr(current, name, None) != value
+            }
+            if not differs:
+                continue
+            mismatched += 1
+            if options['check']:
+                self.stdout.write(f'{username}: {differs}')
+            else:
+                stats.rebuild(user_id)
+        if options['check']:
+            if mismatched:
+                raise CommandError(
+                    f'Счётчики расходятся у профилей: {mismatched}'
+                )
+            self.stdout.write('Счётчики совпадают')
+        else:
+            self.stdout.write(f'Пересчитано профилей: {mismatched}')
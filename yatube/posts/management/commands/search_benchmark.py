@@ -0,0 +1,71 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post, User
+
+BENCHMARK_USERNAME = 'search_benchmark'
+BATCH_SIZE = 10000
+WORDS = (
+    'кот', 'собака', 'город', 'море', 'книга', 'музыка', 'поезд', 'лес',
+    'река', 'дом', 'утро', 'вечер', 'дорога', 'песня', 'снег', 'солнце',
+    'письмо', 'друг', 'окно', 'сад',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по индексу FTS5 с LIKE по всей таблице: первая '
+        'страница и число найденных постов, в миллисекундах на запрос. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with transaction.atomic():
+            self.fill(options['posts'], rng)
+            terms = [f'{rng.choice(WORDS)}{rng.randrange(10000)}'
+                     for _ in range(options['queries'])]
+            methods = (
+                ('LIKE', lambda term: Post.objects.filter(
+                    text__icontains=term
+                )),
+                ('FTS5', lambda term: search.search(term)),
+                ('FTS5 prefix', lambda term: search.search(term[:-1] + '*')),
+            )
+            for name, find in methods:
+                page, count = self.measure(find, terms)
+                self.stdout.write(
+                    f'{name:>12}: страница {page * 1000:9.2f} мс, '
+                    f'число найденных {count * 1000:9.2f} мс'
+                )
+            transaction.set_rollback(True)
+
+    def fill(self, total, rng):
+        author = User.objects.create(username=BENCHMARK_USERNAME)
+        for start in range(0, total, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(author=author, text=' '.join(
+                    f'{rng.choice(WORDS)}{rng.randrange(10000)}'
+                    for _ in range(12)
+                ))
+                for _ in range(start, min(start + BATCH_SIZE, total))
+            )
+
+    def measure(self, find, terms):
+        start = time.perf_counter()
+        for term in terms:
+            list(find(term)[:10])
+        page = (time.perf_counter() - start) / len(terms)
+        start = time.perf_counter()
+        for term in terms:
+            find(term).count()
+        count = (time.perf_counter() - start) / len(terms)
+        return page, count
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы картинок, на которые нет строки в MediaBlob '
+        '(остаются после отката загрузки), или ищет их (--check).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только найти такие файлы, ничего не удаляя.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=media.ORPHAN_MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            names = media.sweep_orphans(options['min_age'])
+            self.stdout.write(f'Удалено файлов без ссылок: {len(names)}')
+            return
+        names = media.orphans(options['min_age'])
+        for name in names:
+            self.stdout.write(name)
+        if names:
+            raise CommandError(f'Файлов без ссылок: {len(names)}')
+        self.stdout.write('Файлов без ссылок нет')
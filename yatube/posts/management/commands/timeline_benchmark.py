@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from posts import timeline
+from posts.models import Follow, Post, User
+from yatube.test_runner import temporary_cache
+
+BENCHMARK_PREFIX = 'timeline_benchmark_'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет стоимость публикации и чтения ленты подписок по обе '
+        'стороны порога TIMELINE_CELEBRITY_THRESHOLD. Данные создаются '
+        'во временной транзакции и откатываются, кеш — временный файл.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument('--reads', type=int, default=50)
+
+    def handle(self, *args, **options):
+        followers = options['followers']
+        for threshold, mode in ((followers + 1, 'fan-out'),
+                                (followers, 'merge on read')):
+            with temporary_cache(), override_settings(
+                TIMELINE_CELEBRITY_THRESHOLD=threshold,
+                TIMELINE_CELEBRITY_HYSTERESIS=0,
+            ):
+                write, read = self.measure(
+                    followers, options['posts'], options['reads']
+                )
+            self.stdout.write(
+                f'{mode:>14}: публикация {write * 1000:8.2f} мс, '
+                f'чтение ленты {read * 1000:8.2f} мс'
+            )
+
+    def measure(self, followers, posts, reads):
+        with transaction.atomic():
+            author = User.objects.create(username=BENCHMARK_PREFIX)
+            User.objects.bulk_create(
+                User(username=f'{BENCHMARK_PREFIX}{number}')
+                for number in range(followers)
+            )
+            readers = User.objects.filter(
+                username__startswith=BENCHMARK_PREFIX
+            ).exclude(pk=author.pk)
+            Follow.objects.bulk_create(
+                Follow(user=reader, author=author) for reader in readers
+            )
+            start = time.perf_counter()
+            for number in range(posts):
+                Post.objects.create(text=f'пост {number}', author=author)
+            write = (time.perf_counter() - start) / posts
+            reader = readers.first()
+            start = time.perf_counter()
+            for _ in range(reads):
+                list(timeline.feed_paginator(reader, 10).get_page())
+            read = (time.perf_counter() - start) / reads
+            transaction.set_rollback(True)
+        return write, read
@@ -0,0 +1,134 @@
+import logging
+import os
+import re
+import time
+
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import MediaBlob
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+DIGEST_NAME = re.compile(r'([0-9a-f]{64})\.\w+')
+ORPHAN_MIN_AGE = 60 * 60
+ORPHAN_BATCH_SIZE = 500
+
+
+def lock(name):
+    """Запирает строку файла до конца транзакции.
+
+    UPDATE берёт блокировку записи SQLite даже без подходящих строк, так
+    что delete_unreferenced для этого файла идёт целиком до или после
+    транзакции. Строка создаётся без ссылок, если её нет: тогда
+    delete_unreferenced, который дождался коммита, файл не тронет.
+    """
+    blobs = MediaBlob.objects.filter(name=name)
+    blobs.update(references=F('references'))
+    MediaBlob.objects.get_or_create(name=name)
+
+
+def acquire(name):
+    """Добавляет ссылку на файл."""
+    if not name:
+        return
+    blob, _ = MediaBlob.objects.get_or_create(name=name)
+    MediaBlob.objects.filter(pk=blob.pk).update(
+        references=F('references') + 1
+    )
+
+
+def release(name):
+    """Убирает ссылку на файл; без ссылок файл удаляется после коммита."""
+    if not name:
+        return
+    blobs = MediaBlob.objects.filter(name=name)
+    blobs.filter(references__gt=0).update(references=F('references') - 1)
+    if blobs.filter(references=0).delete()[0]:
+        transaction.on_commit(lambda: delete_unreferenced(name))
+
+
+def delete_unreferenced(name):
+    """Удаляет файл и его миниатюры, если ссылка на него не появилась
+    снова, пока шёл коммит.
+
+    Проверка и удаление идут под блокировкой записи: загрузка того же
+    файла (storage._save) либо уже закоммитила свою строку, либо ждёт
+    и после удаления пишет файл заново.
+    """
+    with transaction.atomic():
+        blobs = MediaBlob.objects.filter(name=name)
+        blobs.update(references=F('references'))
+        if blobs.exists():
+            return
+        try:
+            delete_thumbnails(ImageFile(name, media_storage))
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+
+
+def remember_image(instance):
+    """Запоминает картинку объекта, сохранённую в базе (до save)."""
+    instance.stored_image = ''
+    if not instance._state.adding:
+        instance.stored_image = type(instance).objects.filter(
+            pk=instance.pk
+        ).values_list('image', flat=True).first() or ''
+
+
+def image_saved(instance):
+    """Переносит ссылку со старой картинки объекта на новую (после save).
+
+    Имя новой картинки известно только после save: хранилище называет
+    файл по содержимому.
+    """
+    name = instance.image.name or ''
+    previous = getattr(instance, 'stored_image', '')
+    if name != previous:
+        acquire(name)
+        release(previous)
+
+
+def stored_files():
+    """Имена файлов хранилища, названных по хешу содержимого."""
+    location = media_storage.location
+    for root, _, file_names in os.walk(location):
+        for file_name in file_names:
+            match = DIGEST_NAME.fullmatch(file_name)
+            if match and os.path.basename(root) == match.group(1)[:2]:
+                yield os.path.relpath(
+                    os.path.join(root, file_name), location
+                ).replace(os.sep, '/')
+
+
+def orphans(min_age=ORPHAN_MIN_AGE) -> list:
+    """Файлы старше min_age секунд без строки в MediaBlob.
+
+    Такой файл остаётся, когда транзакция загрузки откатилась: _save
+    пишет его до коммита. Свежие файлы пропускаются, их загрузки могут
+    ещё идти.
+    """
+    deadline = time.time() - min_age
+    names = [
+        name for name in stored_files()
+        if os.path.getmtime(media_storage.path(name)) <= deadline
+    ]
+    found = []
+    for start in range(0, len(names), ORPHAN_BATCH_SIZE):
+        batch = names[start:start + ORPHAN_BATCH_SIZE]
+        known = set(MediaBlob.objects.filter(
+            name__in=batch
+        ).values_list('name', flat=True))
+        found.extend(name for name in batch if name not in known)
+    return found
+
+
+def sweep_orphans(min_age=ORPHAN_MIN_AGE) -> list:
+    """Удаляет файлы без ссылок (orphans) вместе с миниатюрами."""
+    names = orphans(min_age)
+    for name in names:
+        delete_unreferenced(name)
+    return names
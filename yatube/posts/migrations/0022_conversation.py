@@ -0,0 +1,70 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_conversations(apps, schema_editor):
+    """Диалоги по уже отправленным сообщениям; история считается
+    прочитанной."""
+    Conversation = apps.get_model('posts', 'Conversation')
+    Message = apps.get_model('posts', 'Message')
+    last = {}
+    messages = Message.objects.order_by('dispatched', 'pk').values_list(
+        'pk', 'author_id', 'user_id', 'dispatched'
+    )
+    for pk, author_id, user_id, dispatched in messages.iterator():
+        pair = min(author_id, user_id), max(author_id, user_id)
+        last[pair] = pk, dispatched
+    Conversation.objects.bulk_create(
+        [
+            Conversation(
+                first_user_id=first, second_user_id=second,
+                last_message_id=pk, last_message_at=dispatched,
+            )
+            for (first, second), (pk, dispatched) in last.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0021_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(verbose_name='last message date')),
+                ('first_unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитано первым')),
+                ('second_unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитано вторым')),
+                ('first_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Первый участник')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Message', verbose_name='Последнее сообщение')),
+                ('second_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Второй участник')),
+            ],
+            options={
+                'verbose_name': 'Диалог',
+                'verbose_name_plural': 'Диалоги',
+                'ordering': ('-last_message_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['first_user', 'last_message_at'], name='conversation_first_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['second_user', 'last_message_at'], name='conversation_second_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('first_user', 'second_user'), name='unique_conversation'),
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_conversation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['author', 'user', 'dispatched'], name='message_author_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['user', 'author', 'dispatched'], name='message_user_author_date_idx'),
+        ),
+    ]
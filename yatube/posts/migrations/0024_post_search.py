@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Индекс хранит только токены, текст берётся из posts_post
+# (external content). Триггеры держат его в синхроне при любых записях
+# в posts_post, в том числе при QuerySet.update() и bulk_create().
+CREATE_SEARCH = (
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts (rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts (posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF text "
+    "ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts (posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts (rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "INSERT INTO posts_post_fts (posts_post_fts) VALUES ('rebuild')",
+)
+
+DROP_SEARCH = (
+    "DROP TRIGGER posts_post_fts_update",
+    "DROP TRIGGER posts_post_fts_delete",
+    "DROP TRIGGER posts_post_fts_insert",
+    "DROP TABLE posts_post_fts",
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_message_pair_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH, DROP_SEARCH),
+    ]
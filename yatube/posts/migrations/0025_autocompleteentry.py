@@ -0,0 +1,70 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_autocomplete(apps, schema_editor):
+    AutocompleteEntry = apps.get_model('posts', 'AutocompleteEntry')
+    Group = apps.get_model('posts', 'Group')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    users = User.objects.values_list(
+        'pk', 'username', 'first_name', 'last_name'
+    )
+    AutocompleteEntry.objects.bulk_create(
+        (
+            AutocompleteEntry(
+                key=username.lower(), kind='user', object_id=pk,
+                name=username,
+                label=f'{first_name} {last_name}'.strip() or username,
+            )
+            for pk, username, first_name, last_name in users.iterator()
+        ),
+        batch_size=500,
+    )
+    AutocompleteEntry.objects.bulk_create(
+        [
+            AutocompleteEntry(
+                key=key, kind='group', object_id=group.pk,
+                name=group.slug, label=group.title,
+            )
+            for group in Group.objects.all()
+            for key in sorted({group.slug.lower(), group.title.lower()})
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0024_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutocompleteEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, verbose_name='Ключ')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=5, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('name', models.CharField(max_length=150, verbose_name='Имя в адресе')),
+                ('label', models.CharField(max_length=200, verbose_name='Подпись')),
+            ],
+            options={
+                'verbose_name': 'Подсказка',
+                'verbose_name_plural': 'Подсказки',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='autocompleteentry',
+            index=models.Index(fields=['key'], name='autocomplete_key_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='autocompleteentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'key'), name='unique_autocomplete_entry'),
+        ),
+        migrations.RunPython(fill_autocomplete, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:29
+
+from collections import Counter
+
+from django.db import migrations, models
+import posts.storage
+
+
+def fill_media_blobs(apps, schema_editor):
+    MediaBlob = apps.get_model('posts', 'MediaBlob')
+    references = Counter()
+    for model_name in ('Post', 'Message'):
+        model = apps.get_model('posts', model_name)
+        references.update(model.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True).iterator())
+    MediaBlob.objects.bulk_create(
+        (MediaBlob(name=name, references=count)
+         for name, count in references.items()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_autocompleteentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Файл')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл картинки',
+                'verbose_name_plural': 'Файлы картинок',
+            },
+        ),
+        # Хранилище не влияет на схему, а пересоздание posts_post в SQLite
+        # удалило бы триггеры поискового индекса.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='message',
+                name='image',
+                field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Изображение'),
+            ),
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Изображение'),
+            ),
+        ]),
+        migrations.RunPython(fill_media_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, F
+
+
+def _counts(queryset, field) -> dict:
+    """Число строк по значениям field; порядок модели сброшен, иначе он
+    попал бы в GROUP BY."""
+    return dict(
+        queryset.order_by().values(field).annotate(count=Count('pk'))
+        .values_list(field, 'count')
+    )
+
+
+def fill_userstats(apps, schema_editor):
+    """Строки счётчиков для пользователей, у которых их ещё нет."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserStats = apps.get_model('posts', 'UserStats')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Message = apps.get_model('posts', 'Message')
+    Conversation = apps.get_model('posts', 'Conversation')
+    own_messages = Message.objects.filter(author_id=F('user_id'))
+    own_dialogues = Conversation.objects.filter(
+        first_user_id=F('second_user_id')
+    )
+    counts = {
+        'posts_count': _counts(Post.objects, 'author_id'),
+        'comments_count': _counts(Comment.objects, 'author_id'),
+        'followers_count': _counts(Follow.objects, 'author_id'),
+        'following_count': _counts(Follow.objects, 'user_id'),
+        'messages_sent_count': _counts(Message.objects, 'author_id'),
+        'messages_received_count': _counts(Message.objects, 'user_id'),
+    }
+    first = _counts(Conversation.objects, 'first_user_id')
+    second = _counts(Conversation.objects, 'second_user_id')
+    own = _counts(own_messages, 'author_id')
+    own_dialogue = _counts(own_dialogues, 'first_user_id')
+    user_ids = User.objects.exclude(
+        pk__in=UserStats.objects.values('user_id')
+    ).values_list('pk', flat=True)
+    rows = []
+    for user_id in user_ids.iterator():
+        row = {name: found.get(user_id, 0) for name, found in counts.items()}
+        row['messages_count'] = (
+            row['messages_sent_count'] + row['messages_received_count']
+            - own.get(user_id, 0)
+        )
+        row['dialogues_count'] = (
+            first.get(user_id, 0) + second.get(user_id, 0)
+            - own_dialogue.get(user_id, 0)
+        )
+        rows.append(UserStats(user_id=user_id, **row))
+    UserStats.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0030_post_search_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_userstats, migrations.RunPython.noop),
+    ]
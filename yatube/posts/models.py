@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .storage import media_storage
 
 User = get_user_model()
 
@@ -23,6 +27,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_cards(self):
+        """Посты для карточек: автор и группа одним JOIN, число
+        комментариев — подзапросом на каждую выбранную строку.
+
+        Подзапрос вместо JOIN + GROUP BY не мешает курсорной пагинации
+        читать только одну страницу по индексу.
+        """
+        comments_count = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(count=Count('pk'))
+        return self.select_related('author', 'group').annotate(
+            comments_count=Coalesce(
+                Subquery(
+                    comments_count.values('count'),
+                    output_field=IntegerField(),
+                ),
+                0,
+            )
+        )
+
+
 class Post(models.Model):
     """Модель для постов."""
 
@@ -39,9 +66,12 @@ class Post(models.Model):
         related_name="group_posts", verbose_name="Группа"
     )
     image = models.ImageField(
-        upload_to="posts/", blank=True, null=True, verbose_name="Изображение"
+        upload_to="posts/", storage=media_storage, blank=True, null=True,
+        verbose_name="Изображение"
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ("-pub_date",)
 
@@ -49,6 +79,42 @@ class Post(models.Model):
         return self.text[:15]
 
 
+class SearchTextField(models.TextField):
+    """Столбец индекса FTS5; поддерживает lookup match."""
+
+
+@SearchTextField.register_lookup
+class Match(models.Lookup):
+    """column MATCH выражение FTS5."""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class PostSearchEntry(models.Model):
+    """Модель для строки полнотекстового индекса постов.
+
+    Таблицу posts_post_fts и триггеры создаёт миграция 0024, модель
+    только присоединяет индекс к постам в запросах (см. posts.search).
+    rank — скрытый столбец FTS5, он доступен лишь в запросе с MATCH.
+    """
+
+    post = models.OneToOneField(
+        Post, primary_key=True, db_column="rowid",
+        on_delete=models.DO_NOTHING, related_name="search_entry"
+    )
+    text = SearchTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "posts_post_fts"
+
+
 class Message(models.Model):
     """Модель для сообщений."""
 
@@ -65,16 +131,91 @@ class Message(models.Model):
         related_name="user_messages", verbose_name="Получатель"
     )
     image = models.ImageField(
-        upload_to="posts/", blank=True, null=True, verbose_name="Изображение"
+        upload_to="posts/", storage=media_storage, blank=True, null=True,
+        verbose_name="Изображение"
     )
 
     class Meta:
         ordering = ("-dispatched",)
+        indexes = [
+            models.Index(
+                fields=("author", "user", "dispatched"),
+                name="message_author_user_date_idx"
+            ),
+            models.Index(
+                fields=("user", "author", "dispatched"),
+                name="message_user_author_date_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:200]
 
 
+class Conversation(models.Model):
+    """Модель для диалога двух пользователей.
+
+    Пара упорядочена: first_user — участник с меньшим id. Последнее
+    сообщение и счётчики непрочитанных обновляются при каждом сообщении
+    (см. posts.conversations), поэтому список диалогов читается по
+    индексам (участник, last_message_at) без обхода сообщений.
+    """
+
+    first_user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name="+", verbose_name="Первый участник"
+    )
+    second_user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name="+", verbose_name="Второй участник"
+    )
+    last_message = models.ForeignKey(
+        Message, blank=True, null=True, on_delete=models.SET_NULL,
+        related_name="+", verbose_name="Последнее сообщение"
+    )
+    last_message_at = models.DateTimeField("last message date")
+    first_unread = models.PositiveIntegerField(
+        "Непрочитано первым", default=0
+    )
+    second_unread = models.PositiveIntegerField(
+        "Непрочитано вторым", default=0
+    )
+
+    class Meta:
+        ordering = ("-last_message_at",)
+        verbose_name = "Диалог"
+        verbose_name_plural = "Диалоги"
+        indexes = [
+            models.Index(
+                fields=("first_user", "last_message_at"),
+                name="conversation_first_recent_idx"
+            ),
+            models.Index(
+                fields=("second_user", "last_message_at"),
+                name="conversation_second_recent_idx"
+            ),
+        ]
+        constraints = [models.UniqueConstraint(
+            fields=("first_user", "second_user"),
+            name="unique_conversation"
+        )]
+
+    def __str__(self) -> str:
+        return f"{self.first_user_id} - {self.second_user_id}"
+
+    def partner_of(self, user_id):
+        """Собеседник пользователя user_id."""
+        if self.first_user_id == user_id:
+            return self.second_user
+        return self.first_user
+
+    def unread_for(self, user_id) -> int:
+        """Число непрочитанных сообщений у пользователя user_id."""
+        if self.first_user_id == user_id:
+            return self.first_unread
+        return self.second_unread
+
+
 class Comment(models.Model):
     """Модель для комментариев."""
 
@@ -93,6 +234,12 @@ class Comment(models.Model):
         ordering = ("-created",)
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=("post", "created"), name="comment_post_created_idx"
+            ),
+            models.Index(fields=("created",), name="comment_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.text[:50]
@@ -109,9 +256,166 @@ class Follow(models.Model):
         User, on_delete=models.CASCADE,
         related_name="following", verbose_name="Автор"
     )
+    created = models.DateTimeField(
+        "date created", auto_now_add=True, db_index=True
+    )
 
     class Meta:
         constraints = [models.UniqueConstraint(
             fields=("user", "author"),
             name="unique_list"
         )]
+
+
+class TimelineEntry(models.Model):
+    """Модель для ленты подписок: пост в ленте подписчика.
+
+    Строки раскладываются при публикации поста и при подписке, поэтому
+    лента читается одним проходом по индексу (user, pub_date).
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name="timeline", verbose_name="Читатель"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name="timeline_entries", verbose_name="Пост"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name="+", verbose_name="Автор"
+    )
+    pub_date = models.DateTimeField("date published")
+
+    class Meta:
+        ordering = ("-pub_date",)
+        indexes = [models.Index(
+            fields=("user", "pub_date"), name="timeline_user_date_idx"
+        )]
+        constraints = [models.UniqueConstraint(
+            fields=("user", "post"),
+            name="unique_timeline_entry"
+        )]
+
+
+class UserStats(models.Model):
+    """Модель для счётчиков профиля.
+
+    Счётчики сдвигаются в той же транзакции, что и записи, которые они
+    считают (см. posts.stats), а команда rebuild_stats пересчитывает
+    или проверяет их целиком.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name="stats", verbose_name="Пользователь"
+    )
+    posts_count = models.PositiveIntegerField("Записей", default=0)
+    comments_count = models.PositiveIntegerField("Комментариев", default=0)
+    followers_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+    messages_sent_count = models.PositiveIntegerField(
+        "Сообщений отправлено", default=0
+    )
+    messages_received_count = models.PositiveIntegerField(
+        "Сообщений получено", default=0
+    )
+    messages_count = models.PositiveIntegerField("Сообщений", default=0)
+    dialogues_count = models.PositiveIntegerField("Диалогов", default=0)
+
+    class Meta:
+        verbose_name = "Статистика профиля"
+        verbose_name_plural = "Статистика профилей"
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class AutocompleteEntry(models.Model):
+    """Модель для подсказок по началу имени пользователя или группы.
+
+    Ключ — имя в нижнем регистре; строки упорядочены индексом по ключу,
+    поэтому подсказка — один проход по диапазону [префикс, префикс + ∞).
+    Строки обновляются сигналами при регистрации и изменении групп
+    (см. posts.autocomplete).
+    """
+
+    USER = "user"
+    GROUP = "group"
+    KINDS = ((USER, "Пользователь"), (GROUP, "Группа"))
+
+    key = models.CharField("Ключ", max_length=200)
+    kind = models.CharField("Тип", max_length=5, choices=KINDS)
+    object_id = models.PositiveIntegerField("id объекта")
+    name = models.CharField("Имя в адресе", max_length=150)
+    label = models.CharField("Подпись", max_length=200)
+
+    class Meta:
+        verbose_name = "Подсказка"
+        verbose_name_plural = "Подсказки"
+        indexes = [models.Index(fields=("key",), name="autocomplete_key_idx")]
+        constraints = [models.UniqueConstraint(
+            fields=("kind", "object_id", "key"),
+            name="unique_autocomplete_entry"
+        )]
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class MediaBlob(models.Model):
+    """Модель для счётчика ссылок на файл картинки.
+
+    Одинаковые картинки постов и сообщений хранятся одним файлом
+    (см. posts.storage); файл удаляется, когда уходит последняя ссылка
+    (см. posts.media).
+    """
+
+    name = models.CharField("Файл", max_length=100, unique=True)
+    references = models.PositiveIntegerField("Число ссылок", default=0)
+
+    class Meta:
+        verbose_name = "Файл картинки"
+        verbose_name_plural = "Файлы картинок"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class Change(models.Model):
+    """Модель для журнала изменений постов, комментариев и подписок.
+
+    id строки — курсор синхронизации: клиент спрашивает, что изменилось
+    после последнего виденного id. Удалённые объекты остаются в журнале
+    строками с action="deleted" (см. posts.changes).
+    """
+
+    POST = "post"
+    COMMENT = "comment"
+    FOLLOW = "follow"
+    KINDS = ((POST, "Пост"), (COMMENT, "Комментарий"), (FOLLOW, "Подписка"))
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTIONS = (
+        (CREATED, "Создан"), (UPDATED, "Изменён"), (DELETED, "Удалён")
+    )
+
+    kind = models.CharField("Тип", max_length=7, choices=KINDS)
+    object_id = models.PositiveIntegerField("id объекта")
+    action = models.CharField("Действие", max_length=7, choices=ACTIONS)
+    # Подписки видны только подписчику, как и в API подписок.
+    follower_id = models.PositiveIntegerField(
+        "id подписчика", null=True, blank=True
+    )
+    created = models.DateTimeField(
+        "date created", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Изменение"
+        verbose_name_plural = "Изменения"
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.object_id} {self.action}"
@@ -0,0 +1,91 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from .paginators import decode_cursor
+
+PAGE_CACHE_TIMEOUT = 60 * 60
+FEED = 'feed'
+USERS = 'users'
+LOCK_TIMEOUT = 10
+LOCK_WAIT_STEP = 0.05
+
+
+def versions(*names) -> list:
+    """Версии по именам одним get_many.
+
+    Потерянная (вытесненная) версия заменяется новой, чтобы не совпасть
+    со старой.
+    """
+    keys = [f'{name}_version' for name in names]
+    found = cache.get_many(keys)
+    for key in set(keys) - found.keys():
+        cache.add(key, time.time_ns(), None)
+        found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(name):
+    """Сдвигает версию name."""
+    key = f'{name}_version'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def feed_version() -> int:
+    """Версия ленты: меняется при любом изменении постов, групп
+    или комментариев."""
+    return versions(FEED)[0]
+
+
+def bump_feed():
+    bump(FEED)
+
+
+def profile_version_name(user_id) -> str:
+    """Версия профиля: меняется вместе со счётчиками и данными
+    пользователя."""
+    return f'profile_{user_id}'
+
+
+def feed_page_key(name, request, cursor) -> str:
+    """Ключ страницы ленты: курсор, класс зрителя и версия ленты.
+
+    Испорченный курсор показывает первую страницу и получает её ключ.
+    """
+    if cursor and decode_cursor(cursor) is None:
+        cursor = None
+    viewer = 'user' if request.user.is_authenticated else 'anonymous'
+    cursor_hash = hashlib.md5((cursor or '').encode()).hexdigest()
+    return f'{name}_{viewer}_{cursor_hash}_{feed_version()}'
+
+
+def get_or_render(key, render) -> str:
+    """Достаёт фрагмент из кеша или отрисовывает его.
+
+    При промахе фрагмент рисует только тот запрос, который первым
+    взял блокировку; остальные ждут его результат в кеше не дольше
+    LOCK_TIMEOUT секунд, а потом рисуют сами.
+    """
+    content = cache.get(key)
+    if content is not None:
+        return content
+    lock = f'{key}_lock'
+    locked = cache.add(lock, 1, LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline and cache.get(lock) is not None:
+            time.sleep(LOCK_WAIT_STEP)
+            content = cache.get(key)
+            if content is not None:
+                return content
+    try:
+        content = render()
+        cache.set(key, content, PAGE_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return content
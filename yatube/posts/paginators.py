@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import heapq
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from .models import Post
+
+APPROXIMATE_COUNT_TIMEOUT = 60
+
+OLDER = 'o'
+NEWER = 'n'
+# id вне INTEGER SQLite вызвал бы OverflowError в запросе.
+MAX_PK = 2 ** 63
+
+
+def encode_cursor(direction, value, pk) -> str:
+    """Упаковывает направление и ключ записи в строку для URL."""
+    raw = f'{direction}|{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для испорченного значения возвращает None.
+
+    Даты в базе без часового пояса (USE_TZ = False), поэтому курсор
+    с поясом тоже считается испорченным.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value, pk = datetime.fromisoformat(value), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if (direction not in (OLDER, NEWER) or value.tzinfo is not None
+            or not 0 < pk < MAX_PK):
+        return None
+    return direction, value, pk
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации: ссылки «новее» и «старее»."""
+
+    def __init__(self, object_list, paginator, newer_cursor, older_cursor):
+        super().__init__(object_list, None, paginator)
+        self._newer_cursor = newer_cursor
+        self._older_cursor = older_cursor
+
+    def __repr__(self):
+        return '<Cursor page of %s>' % len(self.object_list)
+
+    def has_next(self):
+        return self._older_cursor is not None
+
+    def has_previous(self):
+        return self._newer_cursor is not None
+
+    def next_cursor(self):
+        return self._older_cursor
+
+    def previous_cursor(self):
+        return self._newer_cursor
+
+    def start_index(self):
+        return 1 if self.object_list else 0
+
+    def end_index(self):
+        return len(self.object_list)
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (дата, id) без OFFSET и COUNT(*).
+
+    Страница выбирается условием по ключу последней показанной записи
+    и опирается на индекс по полю даты, поэтому страница N стоит
+    столько же, сколько первая. Общее число записей по желанию
+    считается приблизительно: COUNT(*) кешируется на
+    APPROXIMATE_COUNT_TIMEOUT секунд.
+    """
+
+    cursor_mode = True
+    tie_field = 'pk'
+
+    def __init__(self, object_list, per_page, key_field='pub_date',
+                 with_total=False):
+        super().__init__(object_list, per_page)
+        self.key_field = key_field
+        self.with_total = with_total
+
+    def cursor_for(self, direction, obj) -> str:
+        return encode_cursor(
+            direction, getattr(obj, self.key_field), obj.pk
+        )
+
+    def sort_key(self, obj):
+        return getattr(obj, self.key_field), obj.pk
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу по курсору, при ошибке — первую."""
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self._older_than(None)
+        direction, value, pk = decoded
+        if direction == NEWER:
+            page = self._newer_than((value, pk))
+            return page if page.object_list else self._older_than(None)
+        return self._older_than((value, pk))
+
+    def page(self, cursor=None):
+        return self.get_page(cursor)
+
+    def fetch(self, direction, key):
+        """Выбирает до per_page + 1 объектов за ключом key.
+
+        Для OLDER объекты идут от новых к старым, для NEWER — наоборот.
+        """
+        field, tie = self.key_field, self.tie_field
+        lookup = 'lt' if direction == OLDER else 'gt'
+        queryset = self.object_list
+        if key is not None:
+            value, pk = key
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value})
+                | Q(**{field: value, f'{tie}__{lookup}': pk})
+            )
+        if direction == OLDER:
+            queryset = queryset.order_by(f'-{field}', f'-{tie}')
+        else:
+            queryset = queryset.order_by(field, tie)
+        return self.prepare_rows(list(queryset[:self.per_page + 1]))
+
+    def prepare_rows(self, rows):
+        """Превращает выбранные строки в объекты страницы."""
+        return rows
+
+    def _older_than(self, key):
+        rows = self.fetch(OLDER, key)
+        return self._build_page(
+            rows[:self.per_page], has_newer=key is not None,
+            has_older=len(rows) > self.per_page,
+        )
+
+    def _newer_than(self, key):
+        rows = self.fetch(NEWER, key)
+        has_newer = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._build_page(rows, has_newer=has_newer, has_older=True)
+
+    def _build_page(self, rows, has_newer, has_older):
+        newer_cursor = older_cursor = None
+        if rows and has_newer:
+            newer_cursor = self.cursor_for(NEWER, rows[0])
+        if rows and has_older:
+            older_cursor = self.cursor_for(OLDER, rows[-1])
+        return CursorPage(rows, self, newer_cursor, older_cursor)
+
+    @property
+    def approximate_count(self):
+        """Кешированное число записей или None, если оно не нужно."""
+        if not self.with_total:
+            return None
+        query = str(self.object_list.order_by().query)
+        key = 'paginator_count_' + hashlib.md5(query.encode()).hexdigest()
+        return cache.get_or_set(
+            key, self.object_list.order_by().count,
+            APPROXIMATE_COUNT_TIMEOUT,
+        )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорный пагинатор по строкам ленты, отдающий сами посты.
+
+    Вторая часть ключа — id поста, а не строки ленты, чтобы курсор
+    совпадал с курсором по самим постам.
+    """
+
+    tie_field = 'post_id'
+
+    def prepare_rows(self, rows):
+        posts = Post.objects.for_cards().in_bulk(
+            [entry.post_id for entry in rows]
+        )
+        return [posts[entry.post_id] for entry in rows
+                if entry.post_id in posts]
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Курсорный пагинатор, сливающий несколько источников.
+
+    Каждый источник — курсорный пагинатор с тем же ключом; страница
+    собирается k-way слиянием их выборок за курсором. Объекты,
+    пришедшие из нескольких источников, показываются один раз.
+    """
+
+    def __init__(self, sources, per_page, key_field='pub_date',
+                 with_total=False):
+        super().__init__(
+            sources, per_page, key_field=key_field, with_total=with_total
+        )
+
+    def fetch(self, direction, key):
+        merged = heapq.merge(
+            *(source.fetch(direction, key) for source in self.object_list),
+            key=self.sort_key, reverse=direction == OLDER,
+        )
+        rows, seen = [], set()
+        for obj in merged:
+            if obj.pk in seen:
+                continue
+            seen.add(obj.pk)
+            rows.append(obj)
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+    @property
+    def approximate_count(self):
+        if not self.with_total:
+            return None
+        return sum(
+            source.approximate_count or 0 for source in self.object_list
+        )
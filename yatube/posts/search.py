@@ -0,0 +1,109 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts создан миграцией 0024 и обновляется триггерами
+на posts_post. Результаты упорядочены по скрытому столбцу rank,
+то есть по BM25: чем меньше значение, тем выше пост.
+
+Перестройка posts_post в SQLite (например, AlterField) удаляет
+триггеры, и индекс молча перестаёт обновляться; их проверяет и
+восстанавливает команда rebuild_search.
+"""
+import re
+
+from django.db import DatabaseError, connection, transaction
+
+from .models import Post, PostSearchEntry
+
+SEARCH_TABLE = PostSearchEntry._meta.db_table
+TERM = re.compile(r'(\w+)(\*?)')
+# Те же триггеры, что создаёт миграция 0024.
+TRIGGERS = {
+    'posts_post_fts_insert': (
+        'CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post '
+        'BEGIN '
+        'INSERT INTO posts_post_fts (rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+    'posts_post_fts_delete': (
+        'CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post '
+        'BEGIN '
+        'INSERT INTO posts_post_fts (posts_post_fts, rowid, text) '
+        "VALUES ('delete', old.id, old.text); "
+        'END'
+    ),
+    'posts_post_fts_update': (
+        'CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF text '
+        'ON posts_post BEGIN '
+        'INSERT INTO posts_post_fts (posts_post_fts, rowid, text) '
+        "VALUES ('delete', old.id, old.text); "
+        'INSERT INTO posts_post_fts (rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+}
+
+
+def match_expression(query) -> str:
+    """Переводит запрос пользователя в выражение MATCH.
+
+    Слова объединяются через AND, «слово*» ищет по префиксу. Остальной
+    синтаксис FTS5 во вводе не действует: каждое слово берётся в
+    кавычки.
+    """
+    return ' '.join(
+        f'"{word}"{star}' for word, star in TERM.findall(query or '')
+    )
+
+
+def search(query, queryset=None):
+    """Посты, подходящие под запрос, от самых релевантных.
+
+    queryset позволяет сузить выборку (группа, автор) и выбрать поля;
+    пустой запрос ничего не находит.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    return queryset.filter(
+        search_entry__text__match=expression
+    ).order_by('search_entry__rank', '-pub_date')
+
+
+def missing_triggers() -> list:
+    """Имена триггеров индекса, которых нет в базе."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = %s", [Post._meta.db_table]
+        )
+        found = {name for name, in cursor.fetchall()}
+    return sorted(TRIGGERS.keys() - found)
+
+
+def index_is_consistent() -> bool:
+    """Совпадает ли индекс с текстами постов.
+
+    integrity-check FTS5 с rank = 1 сверяет индекс и с таблицей
+    posts_post, а не только сам с собой.
+    """
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) '
+                "VALUES ('integrity-check', 1)"
+            )
+    except DatabaseError:
+        return False
+    return True
+
+
+def rebuild():
+    """Пересоздаёт триггеры и заново строит индекс по posts_post."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, sql in TRIGGERS.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
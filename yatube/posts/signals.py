@@ -0,0 +1,130 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (autocomplete, cards, changes, conversations, media,
+               page_cache, stats, thumbnails, timeline)
+from .models import (AutocompleteEntry, Change, Comment, Follow, Group,
+                     Message, Post, User)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Message)
+def image_owner_saving(sender, instance, **kwargs):
+    media.remember_image(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    page_cache.bump_feed()
+    media.image_saved(instance)
+    thumbnails.pregenerate(instance.image, instance.pk)
+    if created:
+        stats.post_added(instance)
+        timeline.push_post(instance)
+    else:
+        cards.bump_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    page_cache.bump_feed()
+    media.release(instance.image.name)
+    stats.post_added(instance, delta=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    page_cache.bump_feed()
+    cards.bump_post(instance.post_id)
+    if created:
+        stats.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    page_cache.bump_feed()
+    cards.bump_post(instance.post_id)
+    stats.comment_added(instance, delta=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+def change_saved(sender, instance, created, **kwargs):
+    changes.record(instance, Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Follow)
+def change_deleted(sender, instance, **kwargs):
+    changes.record(instance, Change.DELETED)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    page_cache.bump_feed()
+    autocomplete.group_changed(instance)
+    if not created:
+        cards.bump_group(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    page_cache.bump_feed()
+    autocomplete.forget(AutocompleteEntry.GROUP, instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    media.image_saved(instance)
+    if created:
+        thumbnails.pregenerate(instance.image)
+        stats.message_added(
+            instance, new_dialogue=conversations.message_added(instance)
+        )
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    media.release(instance.image.name)
+    stats.message_added(
+        instance, delta=-1,
+        new_dialogue=conversations.message_deleted(instance),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.follow_added(instance)
+        timeline.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.follow_added(instance, delta=-1)
+    timeline.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    cards.remember_username(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.create(instance.pk)
+    page_cache.bump(page_cache.profile_version_name(instance.pk))
+    page_cache.bump(page_cache.USERS)
+    autocomplete.user_changed(instance)
+    if cards.is_renamed(instance):
+        cards.bump_author(instance.pk)
+        page_cache.bump_feed()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    page_cache.bump(page_cache.USERS)
+    autocomplete.forget(AutocompleteEntry.USER, instance.pk)
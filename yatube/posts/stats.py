@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import page_cache
+from .models import (Comment, Conversation, Follow, Message, Post, User,
+                     UserStats)
+
+COUNTERS = (
+    'posts_count', 'comments_count', 'followers_count', 'following_count',
+    'messages_sent_count', 'messages_received_count', 'messages_count',
+    'dialogues_count',
+)
+
+
+def compute(user_id) -> dict:
+    """Считает все счётчики пользователя заново."""
+    messages = Message.objects.filter(
+        Q(author_id=user_id) | Q(user_id=user_id)
+    )
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'comments_count': Comment.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+        'messages_sent_count': Message.objects.filter(
+            author_id=user_id
+        ).count(),
+        'messages_received_count': Message.objects.filter(
+            user_id=user_id
+        ).count(),
+        'messages_count': messages.count(),
+        'dialogues_count': Conversation.objects.filter(
+            Q(first_user_id=user_id) | Q(second_user_id=user_id)
+        ).count(),
+    }
+
+
+def rebuild(user_id) -> UserStats:
+    """Пересчитывает и сохраняет счётчики пользователя."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id, defaults=compute(user_id)
+    )
+    return stats
+
+
+def create(user_id):
+    """Пустая строка счётчиков нового пользователя."""
+    UserStats.objects.get_or_create(user_id=user_id)
+
+
+def _missing(user_id) -> UserStats:
+    """Счётчики без строки в базе, посчитанные заново и не записанные."""
+    return UserStats(user_id=user_id, **compute(user_id))
+
+
+def for_user(user_id) -> UserStats:
+    """Счётчики пользователя; ничего не пишет.
+
+    Строки нет только у пользователя, созданного в обход сигналов
+    (bulk_create); тогда счётчики считаются заново.
+    """
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    return stats if stats is not None else _missing(user_id)
+
+
+def for_users(user_ids) -> dict:
+    """Счётчики нескольких пользователей одним запросом; ничего не
+    пишет."""
+    found = UserStats.objects.in_bulk(user_ids)
+    for user_id in user_ids:
+        if user_id not in found:
+            found[user_id] = _missing(user_id)
+    return found
+
+
+def _rebuild_existing(user_id):
+    if User.objects.filter(pk=user_id).exists():
+        rebuild(user_id)
+
+
+def change(user_id, **deltas):
+    """Сдвигает счётчики пользователя в текущей транзакции.
+
+    Если строки нет, после коммита она считается целиком. Не сразу:
+    при удалении пользователя каскад сдвигает счётчики уже удалённой
+    строки, и её нельзя создавать заново. Версия профиля сдвигается
+    в любом случае.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated:
+        transaction.on_commit(lambda: _rebuild_existing(user_id))
+    page_cache.bump(page_cache.profile_version_name(user_id))
+
+
+def post_added(post, delta=1):
+    change(post.author_id, posts_count=delta)
+
+
+def comment_added(comment, delta=1):
+    change(comment.author_id, comments_count=delta)
+
+
+def follow_added(follow, delta=1):
+    change(follow.author_id, followers_count=delta)
+    change(follow.user_id, following_count=delta)
+
+
+def message_added(message, delta=1, new_dialogue=False):
+    """Сообщение учитывается у отправителя и получателя; открытый или
+    закрытый им диалог (см. posts.conversations) меняет число
+    диалогов."""
+    dialogues = delta if new_dialogue else 0
+    if message.author_id == message.user_id:
+        change(
+            message.author_id, messages_sent_count=delta,
+            messages_received_count=delta, messages_count=delta,
+            dialogues_count=dialogues,
+        )
+        return
+    change(
+        message.author_id, messages_sent_count=delta,
+        messages_count=delta, dialogues_count=dialogues,
+    )
+    change(
+        message.user_id, messages_received_count=delta,
+        messages_count=delta, dialogues_count=dialogues,
+    )
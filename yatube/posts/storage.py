@@ -0,0 +1,72 @@
+"""Хранилище картинок постов и сообщений по хешу содержимого.
+
+Файл сохраняется под именем <каталог>/<aa>/<sha256><расширение>, поэтому
+повторная загрузка той же картинки не пишет второй файл, и её миниатюры
+не нарезаются заново. Сколько постов и сообщений ссылается на файл,
+считает posts.media.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который называет файлы по sha256 содержимого.
+
+    Загрузка хешируется по кускам, пока пишется во временный файл
+    рядом с целевым, так что в памяти её целиком не бывает. Решение,
+    переиспользовать ли готовый файл, принимается под блокировкой его
+    строки в MediaBlob (posts.media.lock), поэтому удаление файла без
+    ссылок не проскочит между ним и ссылкой на файл: в запросе
+    (ATOMIC_REQUESTS) блокировка держится до коммита. Файл пишется до
+    коммита; если транзакция откатилась, он остаётся без строки, и его
+    убирает команда sweep_media.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно заменяется хешем в _save.
+        return name
+
+    def _save(self, name, content):
+        directory, base_name = os.path.split(name)
+        extension = os.path.splitext(base_name)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(
+            prefix='.upload-', suffix=extension, dir=full_directory
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = '/'.join(filter(None, (
+                directory, hexdigest[:2], hexdigest + extension
+            )))
+            full_path = self.path(name)
+            # media импортирует модели, а модели — это хранилище.
+            from . import media
+            with transaction.atomic():
+                media.lock(name)
+                if os.path.exists(full_path):
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(temp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+media_storage = ContentAddressedStorage()
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry_name, post_id=None):
+    """Готовые варианты или None, см. posts.thumbnails.ready."""
+    return thumbnails.ready(image, geometry_name, post_id)
@@ -0,0 +1,197 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PostCardCacheTest(TestCase):
+    """Тестирование кеша карточек постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text="старый текст", author=self.user, group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse(
+            "posts:group_posts", kwargs={"slug": self.group.slug}
+        )
+
+    def test_card_is_cached_until_post_changes(self):
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text="тихая правка")
+        response = self.client.get(self.url)
+        self.assertContains(response, "старый текст")
+        self.client.post(
+            reverse("posts:edit", kwargs={
+                "username": self.user.username, "post_id": self.post.pk
+            }),
+            data={"text": "новый текст", "group": self.group.pk},
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "новый текст")
+
+    def test_group_change_invalidates_cards(self):
+        self.client.get(self.url)
+        self.group.title = "Новая группа"
+        self.group.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "#Новая группа")
+
+    def test_author_rename_invalidates_cards(self):
+        self.client.get(self.url)
+        author = User.objects.get(pk=self.user.pk)
+        author.username = "Renamed"
+        author.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "@Renamed")
+        self.assertContains(response, reverse(
+            "posts:profile", kwargs={"username": "Renamed"}
+        ))
+
+
+class IndexPageCacheTest(TestCase):
+    """Тестирование кеша главной страницы."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        for number in range(12):
+            Post.objects.create(text=f"пост номер {number}", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_viewer_class_and_cursor_are_part_of_key(self):
+        self.guest_client.get(reverse("posts:index"))
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, "Избранные авторы")
+        first_page = response.context["page"]
+        response = self.authorized_client.get(
+            reverse("posts:index") + "?cursor=" + first_page.next_cursor()
+        )
+        self.assertContains(response, "пост номер 0")
+        self.assertNotContains(response, "пост номер 11")
+
+    def test_cached_page_skips_queries_until_posts_change(self):
+        self.guest_client.get(reverse("posts:index"))
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse("posts:index"))
+        self.assertFalse(any(
+            "posts_post" in query["sql"] for query in queries.captured_queries
+        ))
+        Post.objects.create(text="свежий пост", author=self.user)
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertContains(response, "свежий пост")
+
+    def test_concurrent_miss_waits_for_first_render(self):
+        """Пока фрагмент рисует другой запрос, промах ждёт его результат."""
+        key = "coalescing_test"
+        cache.add(f"{key}_lock", 1, page_cache.LOCK_TIMEOUT)
+        timer = threading.Timer(0.1, cache.set, args=(key, "готово"))
+        timer.start()
+        renders = []
+        content = page_cache.get_or_render(
+            key, lambda: renders.append(1) or "заново"
+        )
+        timer.join()
+        self.assertEqual(content, "готово")
+        self.assertEqual(renders, [])
+
+
+class ConditionalGetTest(TestCase):
+    """Тестирование ответов 304 по ETag."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.post = Post.objects.create(text="пост", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_unchanged_pages_return_not_modified(self):
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:profile", kwargs={"username": "Author"}),
+            reverse("posts:post", kwargs={
+                "username": "Author", "post_id": self.post.pk
+            }),
+            reverse("api-v1:posts-list"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as full:
+                    etag = self.client.get(url)["ETag"]
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertLess(len(queries), len(full))
+                self.assertFalse(any(
+                    "posts_comment" in query["sql"]
+                    for query in queries.captured_queries
+                ))
+
+    def test_comment_changes_post_etag(self):
+        url = reverse("posts:post", kwargs={
+            "username": "Author", "post_id": self.post.pk
+        })
+        etag = self.client.get(url)["ETag"]
+        Comment.objects.create(
+            text="комментарий", author=self.reader, post=self.post
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "комментарий")
+
+    def test_new_csrf_secret_changes_post_etag(self):
+        """Страница из 304 не отдаёт форму со старым токеном CSRF."""
+        url = reverse("posts:post", kwargs={
+            "username": "Author", "post_id": self.post.pk
+        })
+        etag = self.client.get(url)["ETag"]
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = "a" * 32
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+    def test_author_rename_changes_feed_etags(self):
+        urls = (reverse("posts:index"), reverse("api-v1:posts-list"))
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        author = User.objects.get(pk=self.user.pk)
+        author.username = "Renamed"
+        author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Renamed")
+
+    def test_follow_changes_profile_etag(self):
+        url = reverse("posts:profile", kwargs={"username": "Author"})
+        etag = self.client.get(url)["ETag"]
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["following"])
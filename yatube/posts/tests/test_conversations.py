@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Conversation, Message, User
+
+
+class ConversationViewsTest(TestCase):
+    """Тестирование списка диалогов и переписки."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Reader")
+        cls.partners = [
+            User.objects.create_user(username=f"Partner_{number}")
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        for partner in self.partners:
+            Message.objects.create(
+                author=partner, user=self.user, text=f"от {partner}"
+            )
+        Message.objects.create(
+            author=self.user, user=self.partners[0], text="ответ"
+        )
+
+    def test_inbox_lists_conversations_by_recency(self):
+        response = self.client.get(
+            reverse("posts:messages", kwargs={"username": "Reader"})
+        )
+        partners = [
+            conversation.partner.username
+            for conversation in response.context["page"]
+        ]
+        self.assertEqual(partners, ["Partner_0", "Partner_2", "Partner_1"])
+
+    def test_thread_shows_pair_and_marks_read(self):
+        response = self.client.get(
+            reverse("posts:thread", kwargs={"username": "Partner_1"})
+        )
+        self.assertEqual(
+            [message.text for message in response.context["page"]],
+            ["от Partner_1"],
+        )
+        conversation = Conversation.objects.get(second_user=self.partners[1])
+        self.assertEqual(conversation.unread_for(self.user.pk), 0)
+
+    def test_thread_loads_older_messages_by_cursor(self):
+        for number in range(55):
+            Message.objects.create(
+                author=self.partners[2], user=self.user, text=f"№{number}"
+            )
+        url = reverse("posts:thread", kwargs={"username": "Partner_2"})
+        page = self.client.get(url).context["page"]
+        self.assertEqual(len(page), 50)
+        self.assertEqual(page[0].text, "№54")
+        older = self.client.get(url + "?cursor=" + page.next_cursor())
+        self.assertEqual(
+            [message.text for message in older.context["page"]],
+            ["№4", "№3", "№2", "№1", "№0", "от Partner_2"],
+        )
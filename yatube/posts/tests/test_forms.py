@@ -1,11 +1,17 @@
+import hashlib
+import os
 import shutil
 import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from posts import uploads, workers
 from posts.forms import PostForm
 from posts.models import Follow, Group, Post, User
 
@@ -36,6 +42,7 @@ class PostFormTests(TestCase):
             b"\x02\x00\x01\x00\x00\x02\x02\x0C"
             b"\x0A\x00\x3B"
         )
+        self.digest = hashlib.sha256(small_gif).hexdigest()
         uploaded = SimpleUploadedFile(
             name="small.gif",
             content=small_gif,
@@ -65,7 +72,7 @@ class PostFormTests(TestCase):
                 author=self.user,
                 text=self.form_data["text"],
                 group=self.group.id,
-                image="posts/small.gif",
+                image=f"posts/{self.digest[:2]}/{self.digest}.gif",
             ).exists()
         )
 
@@ -95,6 +102,97 @@ class PostFormTests(TestCase):
         )
 
 
+@override_settings(IMAGE_WORKERS=0)
+class UploadLimitsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = User.objects.create_user(username="Uploader")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def post_image(self, content, name="photo.jpg"):
+        return self.authorized_client.post(reverse("posts:new"), data={
+            "text": "картинка",
+            "image": SimpleUploadedFile(name, content, "image/jpeg"),
+        })
+
+    def jpeg(self, size, orientation=None):
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        output = BytesIO()
+        Image.new("RGB", size, "red").save(output, "JPEG", exif=exif)
+        return output.getvalue()
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_too_many_bytes(self):
+        response = self.post_image(self.jpeg((40, 20)))
+        self.assertFormError(
+            response, "form", "image", "Файл больше 100\xa0байт."
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_fields_after_large_file_are_kept(self):
+        """Поля после слишком большого файла всё равно разбираются."""
+        response = self.authorized_client.post(reverse("posts:new"), data={
+            "image": SimpleUploadedFile(
+                "photo.jpg", self.jpeg((40, 20)), "image/jpeg"
+            ),
+            "text": "картинка",
+        })
+        form = response.context["form"]
+        self.assertEqual(list(form.errors), ["image"])
+        self.assertEqual(form["text"].value(), "картинка")
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=10 ** 6)
+    def test_too_many_pixels(self):
+        response = self.post_image(self.jpeg((1001, 1000)))
+        self.assertFormError(
+            response, "form", "image", "Картинка больше 1 Мп."
+        )
+
+    def test_truncated_image_is_rejected(self):
+        content = self.jpeg((400, 200), orientation=6)
+        response = self.post_image(content[:len(content) // 2])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors["image"])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_WORKERS=1, IMAGE_NORMALIZE_TIMEOUT=0,
+                       IMAGE_MAX_SIDE=10)
+    def test_slow_normalizing_is_rejected(self):
+        self.addCleanup(workers.discard, "uploads")
+        response = self.post_image(self.jpeg((40, 20)))
+        self.assertFormError(response, "form", "image", uploads.TOO_SLOW)
+        self.assertFalse(Post.objects.exists())
+
+    def test_broken_pool_is_replaced(self):
+        self.addCleanup(workers.discard, "test")
+        broken = workers.pool("test", 1)
+        with self.assertRaises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+        self.assertEqual(workers.submit("test", 1, abs, -1).result(), 1)
+        self.assertIsNot(workers.pool("test", 1), broken)
+
+    @override_settings(IMAGE_MAX_SIDE=10)
+    def test_image_is_rotated_downscaled_and_stripped(self):
+        """Поворот по EXIF, уменьшение и удаление метаданных."""
+        self.post_image(self.jpeg((40, 20), orientation=6))
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.size, (5, 10))
+            self.assertNotIn("exif", image.info)
+
+
 class FollowFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -1,6 +1,23 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-from posts.models import Group, Post, User
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from posts import conversations, media, stats
+from posts.models import (Comment, Conversation, Follow, Group, MediaBlob,
+                          Message, Post, User, UserStats)
+from posts.storage import media_storage
+
+GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!"
+       b"\xf9\x04\x00\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00"
+       b"\x00\x02\x02D\x01\x00;")
 
 
 class PostModelTest(TestCase):
@@ -33,3 +50,156 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_title = group.title
         self.assertEqual(expected_object_title, str(group))
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        cls.user_1 = User.objects.create_user(username="Name_1")
+        cls.user_2 = User.objects.create_user(username="Name_2")
+
+    def test_counters_follow_writes(self):
+        """Счётчики профиля совпадают с пересчётом после записей."""
+        post = Post.objects.create(text="пост", author=self.user)
+        Comment.objects.create(post=post, author=self.user_1, text="к")
+        Follow.objects.create(user=self.user_1, author=self.user)
+        Message.objects.create(author=self.user, user=self.user_1, text="1")
+        Message.objects.create(author=self.user_1, user=self.user, text="2")
+        Message.objects.create(author=self.user, user=self.user_2, text="3")
+        Message.objects.filter(text="3").delete()
+        Post.objects.create(text="пост 2", author=self.user).delete()
+        for user in (self.user, self.user_1, self.user_2):
+            with self.subTest(user=user):
+                saved = stats.for_user(user.pk)
+                expected = stats.compute(user.pk)
+                for name, value in expected.items():
+                    self.assertEqual(getattr(saved, name), value, name)
+        self.assertEqual(stats.for_user(self.user.pk).dialogues_count, 1)
+
+    def test_reads_do_not_write(self):
+        Post.objects.create(text="пост", author=self.user)
+        UserStats.objects.filter(user=self.user).delete()
+        self.assertEqual(stats.for_user(self.user.pk).posts_count, 1)
+        self.assertEqual(
+            stats.for_users([self.user.pk])[self.user.pk].posts_count, 1
+        )
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+    def commit(self, write):
+        """Выполняет write и затем её колбэки on_commit из posts.stats."""
+        callbacks = []
+        with mock.patch("posts.stats.transaction.on_commit",
+                        callbacks.append):
+            write()
+        for callback in callbacks:
+            callback()
+
+    def test_change_restores_missing_row(self):
+        UserStats.objects.filter(user=self.user).delete()
+        self.commit(lambda: Post.objects.create(text="пост", author=self.user))
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).posts_count, 1
+        )
+
+    def test_deleted_user_row_is_not_restored(self):
+        user = User.objects.create_user(username="Gone")
+        user_id = user.pk
+        Post.objects.create(text="пост", author=user)
+        self.commit(user.delete)
+        self.assertFalse(UserStats.objects.filter(user_id=user_id).exists())
+
+
+class ConversationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        cls.user_1 = User.objects.create_user(username="Name_1")
+
+    def test_messages_update_conversation(self):
+        """Диалог хранит последнее сообщение и непрочитанные каждого."""
+        Message.objects.create(author=self.user_1, user=self.user, text="1")
+        last = Message.objects.create(
+            author=self.user_1, user=self.user, text="2"
+        )
+        Message.objects.create(author=self.user, user=self.user_1, text="3")
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message.text, "3")
+        self.assertEqual(conversation.unread_for(self.user.pk), 2)
+        self.assertEqual(conversation.unread_for(self.user_1.pk), 1)
+        conversations.mark_read(conversation, self.user.pk)
+        Message.objects.filter(text="3").delete()
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message, last)
+        self.assertEqual(conversation.unread_for(self.user.pk), 0)
+        self.assertEqual(conversation.unread_for(self.user_1.pk), 0)
+        Message.objects.all().delete()
+        self.assertFalse(Conversation.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class MediaBlobTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        cls.user_1 = User.objects.create_user(username="Name_1")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, name):
+        return SimpleUploadedFile(name, GIF, content_type="image/gif")
+
+    def test_same_image_is_stored_once(self):
+        """Одинаковые картинки — один файл, удаляется с последней ссылкой."""
+        post = Post.objects.create(
+            text="пост", author=self.user, image=self.upload("a.gif")
+        )
+        message = Message.objects.create(
+            text="сообщение", author=self.user, user=self.user_1,
+            image=self.upload("b.gif"),
+        )
+        name = post.image.name
+        self.assertEqual(message.image.name, name)
+        self.assertEqual(len(os.listdir(os.path.dirname(
+            media_storage.path(name)
+        ))), 1)
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 2)
+        post.delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 1)
+        message.image = None
+        message.save()
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        media.delete_unreferenced(name)
+        self.assertFalse(media_storage.exists(name))
+
+    def test_reused_file_is_locked_before_reference(self):
+        """Файл, который загрузка решила переиспользовать, не удаляется
+        до её коммита."""
+        post = Post.objects.create(
+            text="пост", author=self.user, image=self.upload("a.gif")
+        )
+        name = post.image.name
+        post.delete()
+        self.assertEqual(
+            media_storage.save("posts/c.gif", self.upload("c.gif")), name
+        )
+        media.delete_unreferenced(name)
+        self.assertTrue(media_storage.exists(name))
+
+    def test_rolled_back_upload_is_swept(self):
+        """Файл загрузки, транзакция которой откатилась, убирает
+        sweep_media."""
+        with transaction.atomic():
+            name = media_storage.save("posts/d.gif", self.upload("d.gif"))
+            transaction.set_rollback(True)
+        self.assertTrue(media_storage.exists(name))
+        self.assertNotIn(name, media.orphans())
+        self.assertIn(name, media.orphans(min_age=0))
+        call_command("sweep_media", min_age=0, stdout=StringIO())
+        self.assertFalse(media_storage.exists(name))
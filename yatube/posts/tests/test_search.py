@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post, User
+
+
+class SearchViewsTest(TestCase):
+    """Тестирование поиска по постам."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.other = User.objects.create_user(username="Other")
+        cls.group = Group.objects.create(title="Котики", slug="cats")
+        Post.objects.create(text="кот и ещё кот", author=cls.user)
+        Post.objects.create(
+            text="рыжий кот спит на солнце", author=cls.other,
+            group=cls.group,
+        )
+        Post.objects.create(text="собака", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def found(self, **params):
+        response = self.client.get(reverse("posts:search"), params)
+        return [post.text for post in response.context["page"]]
+
+    def test_search_ranks_and_filters(self):
+        self.assertEqual(
+            self.found(q="кот"), ["кот и ещё кот", "рыжий кот спит на солнце"]
+        )
+        self.assertEqual(self.found(q="сол*"), ["рыжий кот спит на солнце"])
+        self.assertEqual(
+            self.found(q="кот", group="cats"), ["рыжий кот спит на солнце"]
+        )
+        self.assertEqual(
+            self.found(q="кот", author="Author"), ["кот и ещё кот"]
+        )
+        self.assertEqual(self.found(q="OR NOT"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        Post.objects.filter(text="собака").update(text="пёс")
+        self.assertEqual(self.found(q="собака"), [])
+        self.assertEqual(self.found(q="пёс"), ["пёс"])
+        Post.objects.filter(text="пёс").delete()
+        self.assertEqual(self.found(q="пёс"), [])
+
+    def test_search_triggers_exist(self):
+        """Миграции не потеряли триггеры индекса."""
+        self.assertEqual(search.missing_triggers(), [])
+        self.assertTrue(search.index_is_consistent())
+
+    def test_rebuild_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER posts_post_fts_update")
+        Post.objects.filter(text="собака").update(text="пёс")
+        with self.assertRaises(CommandError):
+            call_command("rebuild_search", "--check", stdout=StringIO())
+        call_command("rebuild_search", stdout=StringIO())
+        call_command("rebuild_search", "--check", stdout=StringIO())
+        self.assertEqual(self.found(q="пёс"), ["пёс"])
+
+    def test_api_search(self):
+        response = self.client.get(
+            reverse("api-v1:posts-list"), {"search": "спит"}
+        )
+        self.assertEqual(
+            [post["text"] for post in response.json()["results"]],
+            ["рыжий кот спит на солнце"],
+        )
+
+
+class AutocompleteViewsTest(TestCase):
+    """Тестирование подсказок пользователей и групп."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(username="Alice")
+        User.objects.create_user(username="alex", first_name="Алексей")
+        User.objects.create_user(username="Bob")
+        cls.group = Group.objects.create(title="Альпинисты", slug="alpine")
+
+    def complete(self, prefix):
+        response = self.client.get(
+            reverse("posts:autocomplete"), {"q": prefix}
+        )
+        return [(item["type"], item["label"])
+                for item in response.json()["results"]]
+
+    def test_prefix_matches_users_and_groups(self):
+        self.assertEqual(
+            self.complete("AL"),
+            [("user", "Алексей"), ("user", "Alice"), ("group", "Альпинисты")],
+        )
+        self.assertEqual(self.complete("альп"), [("group", "Альпинисты")])
+        self.assertEqual(self.complete(" "), [])
+
+    def test_index_follows_changes(self):
+        self.group.title = "Скалолазы"
+        self.group.save()
+        self.assertEqual(self.complete("альп"), [])
+        self.assertEqual(self.complete("скал"), [("group", "Скалолазы")])
+        User.objects.get(username="Bob").delete()
+        self.assertEqual(self.complete("b"), [])
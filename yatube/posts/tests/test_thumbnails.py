@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import cards, thumbnails, workers
+from posts.models import Group, Post, User
+
+settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT)
+class ThumbnailPregenerationTest(TestCase):
+    """Тестирование заглушки до нарезки миниатюр."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text="пост с картинкой", author=self.user, group=self.group,
+            image=SimpleUploadedFile(
+                name="pixel.gif", content_type="image/gif",
+                content=(b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00"
+                         b"\xff\xff\xff!\xf9\x04\x00\x00\x00\x00\x00,\x00"
+                         b"\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01"
+                         b"\x00;"),
+            ),
+        )
+        self.url = reverse("posts:group_posts", kwargs={"slug": "group"})
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "Изображение обрабатывается")
+        self.assertNotContains(response, '<img class="card-img"')
+        thumbnails.generate(self.post.image.name, self.post.pk)
+        response = self.client.get(self.url)
+        self.assertContains(response, '<img class="card-img"')
+        self.assertNotContains(response, "Изображение обрабатывается")
+
+    def test_placeholder_card_is_not_cached(self):
+        self.client.get(self.url)
+        post = Post.objects.get(pk=self.post.pk)
+        cards.prefetch([post])
+        self.assertIsNone(post.card_body)
+
+    def test_failed_submit_is_logged_and_pool_replaced(self):
+        broken = workers.pool("thumbnails", 1)
+        broken.shutdown()
+        thumbnails.queue(self.post.image, self.post.pk)
+        with self.assertLogs("posts.thumbnails", "ERROR"):
+            thumbnails._submit(self.post.image.name, self.post.pk)
+        replaced = workers.pool("thumbnails", 1)
+        self.addCleanup(workers.discard, "thumbnails")
+        self.assertIsNot(replaced, broken)
+        self.assertTrue(cache.add(
+            thumbnails._queued_key(self.post.image.name), 1
+        ))
+
+    def test_responsive_variants(self):
+        thumbnails.generate(self.post.image.name, self.post.pk)
+        response = self.client.get(self.url)
+        self.assertContains(response, '<source type="image/webp"')
+        for width in thumbnails.WIDTHS:
+            self.assertContains(response, f".webp {width}w")
+            self.assertContains(response, f".jpg {width}w")
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_prefetch_reads_store_once_per_page(self):
+        thumbnails.generate(self.post.image.name, self.post.pk)
+        Post.objects.create(
+            text="ещё пост", author=self.user, group=self.group,
+            image=self.post.image.name,
+        )
+        cache.clear()
+        posts = list(Post.objects.filter(group=self.group))
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        with self.assertNumQueries(0):
+            for post in posts:
+                self.assertIsNotNone(thumbnails.ready(post.image, "card"))
+        posts = list(Post.objects.filter(group=self.group))
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(posts)
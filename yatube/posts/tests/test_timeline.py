@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+@override_settings(TIMELINE_CELEBRITY_THRESHOLD=3,
+                   TIMELINE_CELEBRITY_HYSTERESIS=1, TIMELINE_WORKERS=0)
+class HybridTimelineTest(TestCase):
+    """Тестирование ленты подписок с порогом для популярных авторов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username="Star")
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.reader_1 = User.objects.create_user(username="Reader_1")
+        cls.reader_2 = User.objects.create_user(username="Reader_2")
+
+    def setUp(self):
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.reader_1, author=self.star)
+        Follow.objects.create(user=self.reader_2, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_celebrity_posts_are_merged_on_read(self):
+        """Посты популярного автора не раскладываются,
+        но попадают в ленту при чтении."""
+        post_1 = Post.objects.create(text="обычный", author=self.author)
+        post_2 = Post.objects.create(text="звёздный", author=self.star)
+        post_3 = Post.objects.create(text="обычный 2", author=self.author)
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post_2).exists()
+        )
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            list(response.context["page"]), [post_3, post_2, post_1]
+        )
+
+    def test_celebrity_in_band_is_still_merged(self):
+        """Чуть ниже порога автор читается слиянием, без дозаписи."""
+        post = Post.objects.create(text="звёздный", author=self.star)
+        Follow.objects.filter(user=self.reader_2, author=self.star).delete()
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page"]), [post])
+
+    @mock.patch("posts.timeline.transaction.on_commit",
+                lambda callback: callback())
+    def test_celebrity_below_band_is_backfilled(self):
+        """Ниже полосы слияния посты автора дописываются в ленты."""
+        post = Post.objects.create(text="звёздный", author=self.star)
+        Follow.objects.filter(
+            user__in=[self.reader_1, self.reader_2], author=self.star
+        ).delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов страницы ленты не зависит от числа постов."""
+    QUERY_BUDGET = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for number in range(12):
+            post = Post.objects.create(
+                text=f"пост {number}", author=cls.user, group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.reader, text="к")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_pages_fit_query_budget(self):
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_posts", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+            reverse("posts:follow_index"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "(1)")
+                self.assertLessEqual(len(queries), self.QUERY_BUDGET)
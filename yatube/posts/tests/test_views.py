@@ -1,7 +1,9 @@
+import base64
 import shutil
 import tempfile
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -247,6 +249,25 @@ class PostPagesTests(TestCase):
         ).exists()
         self.assertFalse(following)
 
+    def test_follow_index_follows_subscriptions(self):
+        """Лента подписок пополняется при подписке и новом посте
+        и очищается при отписке."""
+        follow_url = reverse(
+            "posts:profile_follow", kwargs={"username": self.user.username}
+        )
+        unfollow_url = reverse(
+            "posts:profile_unfollow", kwargs={"username": self.user.username}
+        )
+        self.authorized_client_1.get(follow_url)
+        new_post = Post.objects.create(text="новый пост", author=self.user)
+        response = self.authorized_client_1.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            list(response.context["page"]), [new_post, self.post]
+        )
+        self.authorized_client_1.get(unfollow_url)
+        response = self.authorized_client_1.get(reverse("posts:follow_index"))
+        self.assertEqual(len(response.context["page"]), 0)
+
 
 class PaginatorViewsTest(TestCase):
     """Тестирование пагинатора."""
@@ -274,8 +295,15 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(reverse("posts:index"))
         self.assertEqual(len(response.context.get("page").object_list), 10)
 
+    def next_page(self, url):
+        """Переход по ссылке «старее» с первой страницы."""
+        first_page = self.client.get(url).context.get("page")
+        return self.client.get(
+            url + "?cursor=" + first_page.next_cursor()
+        )
+
     def test_second_page_index_contains_three_records(self):
-        response = self.client.get(reverse("posts:index") + "?page=2")
+        response = self.next_page(reverse("posts:index"))
         self.assertEqual(len(response.context.get("page").object_list), 3)
 
     def test_first_page_group_contains_twelve_records(self):
@@ -286,9 +314,9 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(response.context.get("page").object_list), 12)
 
     def test_second_page_group_contains_one_record(self):
-        response = self.client.get(reverse(
+        response = self.next_page(reverse(
             "posts:group_posts",
-            kwargs={"slug": self.group.slug}) + "?page=2"
+            kwargs={"slug": self.group.slug})
         )
         self.assertEqual(len(response.context.get("page").object_list), 1)
 
@@ -300,8 +328,48 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(response.context.get("page").object_list), 10)
 
     def test_second_page_profile_contains_three_records(self):
-        response = self.client.get(reverse(
+        response = self.next_page(reverse(
             "posts:profile",
-            kwargs={"username": self.user.username}) + "?page=2"
+            kwargs={"username": self.user.username})
         )
         self.assertEqual(len(response.context.get("page").object_list), 3)
+
+    def test_cursor_pages_do_not_overlap(self):
+        """Страницы «старее» и «новее» не теряют и не повторяют записи."""
+        url = reverse("posts:index")
+        first_page = self.client.get(url).context.get("page")
+        second_page = self.client.get(
+            url + "?cursor=" + first_page.next_cursor()
+        ).context.get("page")
+        shown = [post.pk for post in first_page]
+        shown += [post.pk for post in second_page]
+        expected = list(Post.objects.order_by(
+            "-pub_date", "-pk"
+        ).values_list("pk", flat=True))
+        self.assertEqual(shown, expected)
+        self.assertFalse(second_page.has_next())
+        back_page = self.client.get(
+            url + "?cursor=" + second_page.previous_cursor()
+        ).context.get("page")
+        self.assertEqual(list(back_page), list(first_page))
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(reverse("posts:index") + "?cursor=zzz")
+        self.assertEqual(len(response.context.get("page").object_list), 10)
+
+    def test_out_of_range_cursor_shows_first_page(self):
+        """id больше INTEGER и дата с часовым поясом не ломают запрос."""
+        for raw in ("o|2020-01-01T00:00:00|99999999999999999999999",
+                    "o|2020-01-01T00:00:00+03:00|1"):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            for url in (reverse("posts:index"),
+                        reverse("posts:profile", args=(self.user,))):
+                response = self.client.get(url, {"cursor": cursor})
+                self.assertEqual(
+                    len(response.context.get("page").object_list), 10
+                )
+            cache.clear()
+            response = self.client.get(
+                reverse("api-v1:posts-list"), {"cursor": cursor}
+            )
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,311 @@
+"""Нарезка миниатюр вне запросов, в пуле процессов.
+
+Каждая известная геометрия (GEOMETRIES) режется в нескольких ширинах
+(WIDTHS) и форматах (FORMATS) для srcset. Варианты ставятся в очередь
+после сохранения картинки. Страницы берут только готовые миниатюры
+(ready); пока их нет, шаблон показывает заглушку, так что запрос
+страницы никогда не декодирует оригинал. Для целой страницы варианты
+достаются заранее одним обращением к хранилищу (prefetch).
+"""
+import hashlib
+import logging
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+from sorl.thumbnail.parsers import parse_geometry
+
+from . import cards, page_cache, workers
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+GEOMETRIES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+WIDTHS = (480, 960, 1440)
+# Формат и качество; последний формат — запасной для <img>. AVIF не
+# нарезается: sorl-thumbnail 12.6 не знает его расширения.
+FORMATS = (('WEBP', 80), ('JPEG', 85))
+FALLBACK_FORMAT, FALLBACK_WIDTH = 'JPEG', 960
+CARD_SIZES = '(min-width: 768px) 730px, 100vw'
+QUEUED_TIMEOUT = 60 * 10
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который отдаёт миниатюру, только если она готова."""
+
+    def full_options(self, source, options) -> dict:
+        """Опции с умолчаниями, как их дополняет get_thumbnail."""
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options) -> ImageFile:
+        """Файл миниатюры с тем же именем, что даёт get_thumbnail."""
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.full_options(source, options)
+        )
+        return ImageFile(name, default.storage)
+
+    def encode(self, file_, source_image, geometry_string, **options):
+        """Байты миниатюры без записи в хранилище (для отчётов)."""
+        options = self.full_options(ImageFile(file_), options)
+        ratio = default.engine.get_image_ratio(source_image, options)
+        image = default.engine.create(
+            source_image, parse_geometry(geometry_string, ratio), options
+        )
+        return default.engine._get_raw_data(
+            image, options['format'], options['quality'],
+            image_info=default.engine.get_image_info(source_image),
+            progressive=options.get(
+                'progressive', sorl_settings.THUMBNAIL_PROGRESSIVE
+            ),
+        )
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def get_ready_many(self, thumbnail_files) -> dict:
+        """kvstore.get для многих файлов: {ключ файла: миниатюра}.
+
+        Хранилище sorl по умолчанию (кеш поверх таблицы) читается одним
+        get_many кеша и одним запросом к таблице на промахи кеша.
+        """
+        kvstore = default.kvstore
+        if not isinstance(kvstore, cached_db_kvstore.KVStore):
+            return {
+                thumbnail_file.key: kvstore.get(thumbnail_file)
+                for thumbnail_file in thumbnail_files
+            }
+        keys = {add_prefix(thumbnail_file.key): thumbnail_file.key
+                for thumbnail_file in thumbnail_files}
+        values = kvstore.cache.get_many(keys)
+        missing = keys.keys() - values.keys()
+        if missing:
+            stored = dict(KVStore.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            # Как и kvstore.get, отсутствие запоминается в кеше.
+            found = {key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                     for key in missing}
+            kvstore.cache.set_many(
+                found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(found)
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in values.items()
+            if value and value != cached_db_kvstore.EMPTY_VALUE
+        }
+
+
+backend = ReadyThumbnailBackend()
+
+
+class ImageSet:
+    """Готовые варианты одной геометрии для <picture>."""
+
+    sizes = CARD_SIZES
+
+    def __init__(self, thumbnails):
+        self.thumbnails = thumbnails
+
+    def srcset(self, format_) -> str:
+        return ', '.join(
+            f'{thumbnail.url} {thumbnail.width}w'
+            for (variant_format, _), thumbnail in sorted(
+                self.thumbnails.items(), key=lambda item: item[0][1]
+            )
+            if variant_format == format_
+        )
+
+    @property
+    def fallback(self) -> ImageFile:
+        return self.thumbnails[FALLBACK_FORMAT, FALLBACK_WIDTH]
+
+    @property
+    def url(self):
+        return self.fallback.url
+
+    @property
+    def width(self):
+        return self.fallback.width
+
+    @property
+    def height(self):
+        return self.fallback.height
+
+    @property
+    def webp_srcset(self):
+        return self.srcset('WEBP')
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('JPEG')
+
+
+def variants(geometry_name):
+    """Варианты геометрии: (формат, ширина, геометрия, опции)."""
+    geometry, options = GEOMETRIES[geometry_name]
+    base_width, base_height = map(int, geometry.split('x'))
+    for format_, quality in FORMATS:
+        for width in WIDTHS:
+            height = round(base_height * width / base_width)
+            yield format_, width, f'{width}x{height}', {
+                **options, 'format': format_, 'quality': quality,
+            }
+
+
+def all_variants():
+    for geometry_name in GEOMETRIES:
+        yield from variants(geometry_name)
+
+
+def _variant_files(image, geometry_variants) -> dict:
+    return {
+        (format_, width): backend.thumbnail_file(image, geometry, **options)
+        for format_, width, geometry, options in geometry_variants
+    }
+
+
+def prefetch(objects, geometry_name='card'):
+    """Достаёт варианты картинок страницы одним обращением к хранилищу.
+
+    Результат запоминается в image.ready_images, и ready() для этих
+    картинок хранилище уже не читает.
+    """
+    images = [obj.image for obj in objects if obj.image]
+    geometry_variants = list(variants(geometry_name))
+    files = {image.name: _variant_files(image, geometry_variants)
+             for image in images}
+    found = backend.get_ready_many([
+        thumbnail_file
+        for image_files in files.values()
+        for thumbnail_file in image_files.values()
+    ])
+    for image in images:
+        thumbnails = {
+            variant: found.get(thumbnail_file.key)
+            for variant, thumbnail_file in files[image.name].items()
+        }
+        image.ready_images = {
+            **getattr(image, 'ready_images', {}),
+            geometry_name: _image_set(thumbnails),
+        }
+
+
+def _image_set(thumbnails):
+    if None in thumbnails.values():
+        return None
+    return ImageSet(thumbnails)
+
+
+def ready(image, geometry_name, post_id=None):
+    """Готовые варианты (ImageSet) или None, если готовы не все;
+    тогда картинка ставится в очередь."""
+    if not image:
+        return None
+    prefetched = getattr(image, 'ready_images', {})
+    if geometry_name in prefetched:
+        image_set = prefetched[geometry_name]
+    else:
+        image_set = _image_set({
+            variant: default.kvstore.get(thumbnail_file)
+            for variant, thumbnail_file in _variant_files(
+                image, variants(geometry_name)
+            ).items()
+        })
+    image.ready_images = {**prefetched, geometry_name: image_set}
+    if image_set is None:
+        queue(image, post_id)
+    return image_set
+
+
+def pending(image, geometry_name='card') -> bool:
+    """Страница показала заглушку вместо миниатюр картинки."""
+    return bool(image) and getattr(image, 'ready_images', {}).get(
+        geometry_name
+    ) is None
+
+
+def pregenerate(image, post_id=None):
+    """Ставит в очередь картинку, у которой готовы не все миниатюры."""
+    if not image:
+        return
+    files = [backend.thumbnail_file(image, geometry, **options)
+             for _, _, geometry, options in all_variants()]
+    found = backend.get_ready_many(files)
+    if any(thumbnail_file.key not in found for thumbnail_file in files):
+        queue(image, post_id)
+
+
+def queue(image, post_id=None):
+    """Ставит нарезку всех геометрий в очередь после коммита.
+
+    Одна картинка ставится в очередь не чаще раза в QUEUED_TIMEOUT
+    секунд, сколько бы страниц её ни ждали.
+    """
+    name = image.name
+    if not cache.add(_queued_key(name), 1, QUEUED_TIMEOUT):
+        return
+    transaction.on_commit(lambda: _submit(name, post_id))
+
+
+def _queued_key(name) -> str:
+    return 'thumbnail_queued_' + hashlib.md5(name.encode()).hexdigest()
+
+
+def _submit(name, post_id):
+    """Отдаёт нарезку пулу.
+
+    Вызывается из on_commit, когда пост уже сохранён, поэтому ошибка не
+    доходит до ответа: она пишется в лог, пул пересоздаётся, а картинка
+    снимается с очереди и встанет в неё при следующем показе.
+    """
+    try:
+        if not settings.THUMBNAIL_WORKERS:
+            generate(name, post_id)
+            return
+        workers.submit(
+            'thumbnails', settings.THUMBNAIL_WORKERS, generate, name,
+            post_id, initializer=django.setup,
+        )
+    except Exception:
+        logger.exception('Не удалось поставить в очередь миниатюры для %s',
+                         name)
+        workers.discard('thumbnails')
+        cache.delete(_queued_key(name))
+
+
+def generate(name, post_id=None):
+    """Нарезает все геометрии и сбрасывает закешированную карточку."""
+    source = ImageFile(name, media_storage)
+    try:
+        for _, _, geometry, options in all_variants():
+            default.backend.get_thumbnail(source, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось нарезать миниатюры для %s', name)
+        return
+    if post_id is not None:
+        cards.bump_post(post_id)
+        page_cache.bump_feed()
@@ -0,0 +1,164 @@
+import logging
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.db import transaction
+
+from . import stats as profile_stats
+from . import workers
+from .models import Follow, Post, TimelineEntry
+from .paginators import (CursorPaginator, MergedCursorPaginator,
+                         TimelinePaginator)
+
+TIMELINE_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _bulk_insert(entries):
+    """Вставляет строки ленты пачками, не держа их все в памяти."""
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def follower_counts(author_ids) -> dict:
+    """Число подписчиков авторов по счётчикам профиля."""
+    return {
+        author_id: stats.followers_count
+        for author_id, stats in profile_stats.for_users(author_ids).items()
+    }
+
+
+def merge_threshold() -> int:
+    """С такого числа подписчиков посты автора подмешиваются при чтении.
+
+    Это порог минус полоса TIMELINE_CELEBRITY_HYSTERESIS: автор,
+    опустившийся чуть ниже порога, ещё читается слиянием, и его старые
+    посты не надо сразу дописывать в ленты.
+    """
+    return (settings.TIMELINE_CELEBRITY_THRESHOLD
+            - settings.TIMELINE_CELEBRITY_HYSTERESIS)
+
+
+def is_celebrity(author_id) -> bool:
+    """Посты автора с большим числом подписчиков не раскладываются."""
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    return follower_counts([author_id])[author_id] >= threshold
+
+
+def push_post(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id, post_id=post.pk,
+            author_id=post.author_id, pub_date=post.pub_date,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id, post_id=post_id,
+            author_id=author_id, pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def follow(user_id, author_id):
+    """Подписка: посты обычного автора дописываются в ленту."""
+    if not is_celebrity(author_id):
+        backfill(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    """Отписка: посты автора убираются из ленты.
+
+    Когда автор опускается ниже полосы слияния (merge_threshold), его
+    посты, опубликованные без раскладки, дописываются в ленты оставшихся
+    подписчиков после коммита, в пуле процессов. Счётчик подписчиков
+    к этому моменту уже уменьшен.
+    """
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    if follower_counts([author_id])[author_id] == merge_threshold() - 1:
+        transaction.on_commit(lambda: _submit_backfill(author_id))
+
+
+def _submit_backfill(author_id):
+    """Отдаёт дозапись лент подписчиков автора пулу."""
+    try:
+        if not settings.TIMELINE_WORKERS:
+            backfill_followers(author_id)
+            return
+        workers.submit(
+            'timeline', settings.TIMELINE_WORKERS, backfill_followers,
+            author_id, initializer=django.setup,
+        )
+    except Exception:
+        logger.exception('Не удалось дописать ленты подписчиков автора %s',
+                         author_id)
+        workers.discard('timeline')
+
+
+def backfill_followers(author_id):
+    """Дописывает посты автора в ленты всех его подписчиков.
+
+    Если автор к этому времени снова поднялся в полосу слияния, его
+    посты и так подмешиваются при чтении.
+    """
+    if follower_counts([author_id])[author_id] >= merge_threshold():
+        return
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for follower_id in followers.iterator():
+        backfill(follower_id, author_id)
+
+
+def feed_paginator(user, per_page):
+    """Пагинатор ленты подписок пользователя.
+
+    Посты обычных авторов читаются из материализованной ленты, посты
+    авторов от merge_threshold() подписчиков подмешиваются при чтении
+    слиянием их последних постов; повторы слияние отбрасывает.
+    """
+    threshold = merge_threshold()
+    timeline = TimelinePaginator(
+        TimelineEntry.objects.filter(user=user),
+        per_page, with_total=True,
+    )
+    author_ids = list(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+    celebrities = [
+        author_id for author_id, count in follower_counts(author_ids).items()
+        if count >= threshold
+    ]
+    if not celebrities:
+        return timeline
+    sources = [timeline] + [
+        CursorPaginator(
+            Post.objects.for_cards().filter(author_id=author_id), per_page,
+            with_total=True,
+        )
+        for author_id in celebrities
+    ]
+    return MergedCursorPaginator(sources, per_page, with_total=True)
@@ -0,0 +1,188 @@
+"""Приём картинок с ограниченной памятью и ограниченным размером.
+
+Загрузка пишется на диск кусками (BoundedUploadHandler), а с первого
+байта сверх IMAGE_UPLOAD_MAX_BYTES остаток файла пропускается, и форма
+получает вместо него RejectedUpload (files). clean_image отклоняет картинку
+по байтам и пикселям по одному заголовку, до декодирования. Поворот по
+EXIF, удаление метаданных и уменьшение до IMAGE_MAX_SIDE идут в пуле из
+IMAGE_WORKERS процессов. Поэтому всплеск больших загрузок занимает
+память пула, а не процессов сервера.
+"""
+import os
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from . import workers
+
+NORMALIZED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+QUALITY = 90
+TOO_MANY_BYTES = 'Файл больше %s.'
+TOO_MANY_PIXELS = 'Картинка больше %d Мп.'
+TOO_SLOW = 'Картинка обрабатывается слишком долго, загрузите её ещё раз.'
+
+
+class RejectedUpload(UploadedFile):
+    """Загрузка, брошенная на пределе: содержимого нет, size — сколько
+    байт пришло до этого."""
+
+    def __init__(self, name, size):
+        super().__init__(None, name, size=size)
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл и бросает её, как только она
+    превысила IMAGE_UPLOAD_MAX_BYTES.
+
+    Остаток файла читается без записи, поля после него разбираются как
+    обычно. Брошенный файл запоминается в request.rejected_uploads,
+    чтобы форма сообщила о размере.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.request.rejected_uploads = {
+                **getattr(self.request, 'rejected_uploads', {}),
+                self.field_name: RejectedUpload(self.file_name, self.received),
+            }
+            raise SkipFile
+        self.file.write(raw_data)
+
+
+def files(request):
+    """request.FILES вместе с брошенными загрузками."""
+    rejected = getattr(request, 'rejected_uploads', None)
+    if not rejected:
+        return request.FILES
+    uploaded = request.FILES.copy()
+    for field_name, upload in rejected.items():
+        uploaded[field_name] = upload
+    return uploaded
+
+
+def rejected(request, field_name):
+    """Брошенная загрузка поля или None; request — Django или DRF."""
+    request = getattr(request, '_request', request)
+    return getattr(request, 'rejected_uploads', {}).get(field_name)
+
+
+def is_too_large(upload) -> bool:
+    """Файл больше предела; содержимого у такого нет, и ImageField
+    счёл бы его битым, поэтому размер проверяется первым."""
+    return getattr(upload, 'size', 0) > settings.IMAGE_UPLOAD_MAX_BYTES
+
+
+def check_size(upload):
+    if is_too_large(upload):
+        raise ValidationError(
+            TOO_MANY_BYTES % filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES),
+            code='file_too_large',
+        )
+
+
+def _needs_normalizing(image) -> bool:
+    return (image.format in NORMALIZED_FORMATS
+            and not getattr(image, 'is_animated', False)
+            and (max(image.size) > settings.IMAGE_MAX_SIDE
+                 or 'exif' in image.info))
+
+
+def clean_image(upload):
+    """Проверяет пределы загрузки и нормализует её при необходимости.
+
+    Вызывается после ImageField, который уже прочёл заголовок
+    (upload.image), но не декодировал картинку.
+    """
+    if not isinstance(upload, UploadedFile):
+        return upload
+    check_size(upload)
+    width, height = upload.image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        megapixels = settings.IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6
+        raise ValidationError(
+            TOO_MANY_PIXELS % megapixels, code='too_many_pixels'
+        )
+    if _needs_normalizing(upload.image):
+        return normalize(upload)
+    return upload
+
+
+def normalize(upload) -> TemporaryUploadedFile:
+    """Копия загрузки без метаданных, уменьшенная до IMAGE_MAX_SIDE."""
+    if not hasattr(upload, 'temporary_file_path'):
+        spooled = TemporaryUploadedFile(
+            upload.name, upload.content_type, upload.size, upload.charset
+        )
+        for chunk in upload.chunks():
+            spooled.write(chunk)
+        spooled.flush()
+        upload = spooled
+    result = TemporaryUploadedFile(
+        upload.name, upload.content_type, 0, upload.charset
+    )
+    arguments = (
+        upload.temporary_file_path(), result.temporary_file_path(),
+        settings.IMAGE_MAX_SIDE,
+    )
+    # Битый файл (например, обрезанный JPEG) проходит проверку заголовка
+    # в ImageField и падает только при декодировании; упавший процесс
+    # пула ломает пул, он убирается, и следующая загрузка получит новый.
+    # Запрос ждёт пул не дольше IMAGE_NORMALIZE_TIMEOUT.
+    try:
+        if settings.IMAGE_WORKERS:
+            future = workers.submit(
+                'uploads', settings.IMAGE_WORKERS, normalize_file,
+                *arguments,
+            )
+            try:
+                content_type = future.result(
+                    settings.IMAGE_NORMALIZE_TIMEOUT
+                )
+            except futures.TimeoutError:
+                future.cancel()
+                result.close()
+                raise ValidationError(TOO_SLOW, code='normalize_timeout')
+        else:
+            content_type = normalize_file(*arguments)
+    except (OSError, Image.DecompressionBombError,
+            BrokenProcessPool) as error:
+        if isinstance(error, BrokenProcessPool):
+            workers.discard('uploads')
+        result.close()
+        raise ValidationError(
+            forms.ImageField.default_error_messages['invalid_image'],
+            code='invalid_image',
+        )
+    result.content_type = content_type
+    result.size = os.path.getsize(result.temporary_file_path())
+    result.seek(0)
+    return result
+
+
+def normalize_file(source, destination, max_side) -> str:
+    """Выполняется в пуле: поворачивает, уменьшает и пересохраняет
+    картинку без метаданных. Возвращает её content type."""
+    with Image.open(source) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        image.info = {}
+        options = {'exif': b''}
+        if image_format != 'PNG':
+            options['quality'] = QUALITY
+        with open(destination, 'wb') as output:
+            image.save(output, image_format, **options)
+    return Image.MIME[image_format]
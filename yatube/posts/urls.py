@@ -7,6 +7,8 @@ app_name = 'posts'
 urlpatterns = [
     path('new/', views.new_post, name='new'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path('autocomplete/', views.autocomplete_names, name='autocomplete'),
     path('<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('<str:username>/unfollow/', views.profile_unfollow,
@@ -15,6 +17,7 @@ urlpatterns = [
     path('<str:username>/send_message/', views.send_message,
          name='send_message'),
     path('<str:username>/messages/', views.messages, name='messages'),
+    path('<str:username>/thread/', views.thread, name='thread'),
     path('<str:username>/<int:post_id>/', views.post_view,
          name='post'),
     path('<str:username>/<int:post_id>/delete/',
@@ -1,43 +1,99 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http.response import HttpResponse, HttpResponseRedirect
+from django.http.response import (HttpResponse, HttpResponseRedirect,
+                                  JsonResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
 
 from yatube.settings import NUMBER_PAGINATION_PAGES
 
-from .forms import CommentForm, PostForm, MessageForm
-from .models import Comment, Follow, Group, Post, User, Message
+from . import (autocomplete, cards, conditional, conversations, page_cache,
+               search, stats, thumbnails, timeline, uploads)
+from .forms import CommentForm, PostForm, MessageForm, SearchForm
+from .models import Comment, Follow, Group, Message, Post, User
+from .paginators import CursorPaginator
 
 
+@condition(etag_func=conditional.feed_etag)
 def index(request) -> HttpResponse:
-    """view-функция для главной страницы."""
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, NUMBER_PAGINATION_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    """view-функция для главной страницы.
+
+    Лента рисуется из кеша; страница постов выбирается лениво, только
+    если фрагмент приходится рисовать заново.
+    """
+    cursor = request.GET.get('cursor')
+    post_list = Post.objects.for_cards()
+    paginator = CursorPaginator(
+        post_list, NUMBER_PAGINATION_PAGES, with_total=True
+    )
+    page = SimpleLazyObject(lambda: paginator.get_page(cursor))
     context = {'page': page}
+
+    def render_content():
+        cards.prefetch(page)
+        return render_to_string('index_content.html', context, request)
+
+    context['content'] = mark_safe(page_cache.get_or_render(
+        page_cache.feed_page_key('index_page', request, cursor),
+        render_content,
+    ))
     return render(request, 'index.html', context)
 
 
+@condition(etag_func=conditional.feed_etag)
 def group_posts(request, slug) -> HttpResponse:
     """view-функция для страницы сообщества."""
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, 12)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = Post.objects.for_cards().filter(group=group)
+    paginator = CursorPaginator(posts, 12, with_total=True)
+    page = paginator.get_page(request.GET.get('cursor'))
+    cards.prefetch(page)
     context = {'group': group, 'posts': posts, 'page': page}
     return render(request, 'group.html', context)
 
 
+def search_posts(request) -> HttpResponse:
+    """view-функция для поиска по постам."""
+    form = SearchForm(request.GET or None)
+    posts = Post.objects.none()
+    if form.is_valid():
+        posts = Post.objects.for_cards()
+        if form.cleaned_data['group']:
+            posts = posts.filter(group=form.cleaned_data['group'])
+        if form.cleaned_data['author']:
+            posts = posts.filter(
+                author__username=form.cleaned_data['author']
+            )
+        posts = search.search(form.cleaned_data['q'], posts)
+    paginator = Paginator(posts, NUMBER_PAGINATION_PAGES)
+    page = paginator.get_page(request.GET.get('page'))
+    cards.prefetch(page)
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
+    context = {
+        'form': form, 'page': page, 'page_query': page_query.urlencode(),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def autocomplete_names(request) -> JsonResponse:
+    """view-функция для подсказок пользователей и групп по ?q=."""
+    results = autocomplete.complete(request.GET.get('q', ''))
+    return JsonResponse({'results': results})
+
+
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username) -> HttpResponse:
     """view-функция для страницы автора."""
     author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    paginator = Paginator(posts, NUMBER_PAGINATION_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = Post.objects.for_cards().filter(author=author)
+    paginator = CursorPaginator(posts, NUMBER_PAGINATION_PAGES)
+    page = paginator.get_page(request.GET.get('cursor'))
+    cards.prefetch(page)
     if request.user.is_anonymous:
         following = False
     else:
@@ -47,30 +103,51 @@ def profile(request, username) -> HttpResponse:
     context = {
         'author': author, 'page': page, 'following': following,
     }
-    count_posts_and_comments(username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/profile.html', context)
 
 
 @login_required
 def messages(request, username) -> HttpResponse:
-    """view-функция для страницы диалогов."""
+    """view-функция для списка диалогов, от свежих к старым."""
     user = get_object_or_404(User, username=username)
-    messages_author = Message.objects.filter(author=request.user)
-    messages_user = Message.objects.filter(user=request.user)
-    messages = messages_author | messages_user
-    paginator = Paginator(messages, 50)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator = conversations.inbox_paginator(
+        request.user, NUMBER_PAGINATION_PAGES
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    conversations.prepare(page, request.user.pk)
     following = Follow.objects.filter(
             user=request.user, author=user
         ).exists()
     context = {
         'author': user, 'page': page, 'following': following,
     }
-    count_posts_and_comments(username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/messages.html', context)
 
 
+@login_required
+def thread(request, username) -> HttpResponse:
+    """view-функция для переписки с одним собеседником."""
+    partner = get_object_or_404(User, username=username)
+    conversation = conversations.get(request.user.pk, partner.pk)
+    paginator = conversations.thread_paginator(
+        request.user.pk, partner.pk, 50
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    thumbnails.prefetch(page)
+    if conversation is not None:
+        conversations.mark_read(conversation, request.user.pk)
+    following = Follow.objects.filter(
+        user=request.user, author=partner
+    ).exists()
+    context = {
+        'author': partner, 'page': page, 'following': following,
+    }
+    count_posts_and_comments(context)
+    return render(request, 'posts/thread.html', context)
+
+
 @login_required
 def send_message(request, username) -> HttpResponse:
     """view-функция для отправки сообщения."""
@@ -80,7 +157,8 @@ def send_message(request, username) -> HttpResponse:
             user=request.user, author=user
         ).exists()
     form = MessageForm(
-        request.POST or None, files=request.FILES or None, instance=message
+        request.POST or None, files=uploads.files(request) or None,
+        instance=message,
     )
     if form.is_valid():
         message.save()
@@ -91,7 +169,7 @@ def send_message(request, username) -> HttpResponse:
         'author': user, 'message': message, 'form': form,
         'following': following
     }
-    count_posts_and_comments(username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/send_message.html', context)
 
 
@@ -100,20 +178,24 @@ def new_post(request) -> HttpResponse:
     """view-функция для создания нового поста."""
     post = Post(author=request.user)
     form = PostForm(
-        request.POST or None, files=request.FILES or None, instance=post
+        request.POST or None, files=uploads.files(request) or None,
+        instance=post,
     )
     if form.is_valid():
         post.save()
         return HttpResponseRedirect(reverse('posts:index'))
     context = {'author': request.user, 'post': post, 'form': form}
-    count_posts_and_comments(request.user.username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/post_edit.html', context)
 
 
+@condition(etag_func=conditional.post_etag)
 def post_view(request, username, post_id) -> HttpResponse:
     """view-функция для просмотра поста."""
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(
+        Post.objects.for_cards(), id=post_id, author__username=username
+    )
+    comments = Comment.objects.filter(post=post).select_related('author')
     paginator = Paginator(comments, NUMBER_PAGINATION_PAGES)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
@@ -135,7 +217,7 @@ def post_view(request, username, post_id) -> HttpResponse:
         'author': post.author, 'post': post,
         'form': form, 'page': page, 'following': following,
     }
-    count_posts_and_comments(username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/post.html', context)
 
 
@@ -144,7 +226,8 @@ def post_edit(request, username, post_id):
     """view-функция для редактирования поста."""
     post = get_object_or_404(Post, id=post_id, author__username=username)
     form = PostForm(
-        request.POST or None, files=request.FILES or None, instance=post
+        request.POST or None, files=uploads.files(request) or None,
+        instance=post,
     )
     if request.user != post.author:
         return HttpResponseRedirect(
@@ -156,7 +239,7 @@ def post_edit(request, username, post_id):
             reverse('posts:post', args=(post.author, post.pk))
         )
     context = {'author': request.user, 'post': post, 'form': form}
-    count_posts_and_comments(username, context)
+    count_posts_and_comments(context)
     return render(request, 'posts/post_edit.html', context)
 
 
@@ -188,10 +271,11 @@ def delete_comment(request, username, post_id, comment_id) -> HttpResponse:
 @login_required
 def follow_index(request):
     """view-функция для просмотра постов текущих подписок."""
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, NUMBER_PAGINATION_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator = timeline.feed_paginator(
+        request.user, NUMBER_PAGINATION_PAGES
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    cards.prefetch(page)
     context = {'page': page}
     return render(request, 'posts/follow.html', context)
 
@@ -212,17 +296,9 @@ def profile_unfollow(request, username):
     return redirect('posts:profile', username)
 
 
-def count_posts_and_comments(username, context):
-    """Счётчик постов и комментариев."""
-    user = get_object_or_404(User, username=username)
-    context['count'] = Post.objects.filter(author=user).count()
-    context['count_comment'] = Comment.objects.filter(author=user).count()
-    messages_author = Message.objects.filter(author=context['author'])
-    messages_user = Message.objects.filter(user=user)
-    messages = messages_author | messages_user
-    context['messages_count'] = messages.count()
-    dialogues_count = list(set(messages.values_list('user', flat=True)))
-    context['dialogues_count'] = len(dialogues_count)
+def count_posts_and_comments(context):
+    """Счётчики профиля автора из таблицы статистики."""
+    context['stats'] = stats.for_user(context['author'].pk)
     return context
 
 
@@ -0,0 +1,42 @@
+"""Пулы процессов для тяжёлой работы с картинками и лентами.
+
+Процессы запускаются методом spawn: форк процесса сервера унёс бы
+с собой открытые соединения с базой и кешем.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_pools = {}
+
+
+def pool(name, max_workers, initializer=None) -> ProcessPoolExecutor:
+    """Пул с данным именем; создаётся при первом обращении."""
+    if name not in _pools:
+        _pools[name] = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initializer,
+        )
+    return _pools[name]
+
+
+def submit(name, max_workers, fn, *args, initializer=None):
+    """Отдаёт задачу пулу name.
+
+    Пул, сломанный упавшим процессом, больше не принимает задачи
+    (BrokenProcessPool): он заменяется новым, и задача отдаётся ему.
+    """
+    try:
+        return pool(name, max_workers, initializer).submit(fn, *args)
+    except BrokenProcessPool:
+        discard(name)
+        return pool(name, max_workers, initializer).submit(fn, *args)
+
+
+def discard(name):
+    """Убирает пул, который отказал в задаче; следующий pool() создаст
+    новый."""
+    executor = _pools.pop(name, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
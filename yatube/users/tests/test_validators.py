@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from djoser.conf import settings as djoser_settings
+
+from users.forms import CreationForm
+
+User = get_user_model()
+
+
+class ReservedUsernameTest(TestCase):
+    """Тестирование имён, занятых адресами сайта."""
+
+    def test_signup_form_rejects_reserved_names(self):
+        for username in ("search", "autocomplete", "new"):
+            with self.subTest(username=username):
+                form = CreationForm({
+                    "username": username, "password1": "Пароль-12345",
+                    "password2": "Пароль-12345",
+                })
+                self.assertIn("username", form.errors)
+        form = CreationForm({"username": "searcher"})
+        self.assertNotIn("username", form.errors)
+
+    def test_api_signup_rejects_reserved_names(self):
+        serializer = djoser_settings.SERIALIZERS.user_create(data={
+            "username": "autocomplete", "password": "Пароль-12345",
+            "email": "a@example.com",
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("username", serializer.errors)
+
+    def test_api_rename_rejects_reserved_names(self):
+        user = User.objects.create_user(
+            username="Name", password="Пароль-12345"
+        )
+        serializer = djoser_settings.SERIALIZERS.set_username(
+            instance=user,
+            data={"new_username": "search",
+                  "current_password": "Пароль-12345"},
+            context={"request": SimpleNamespace(user=user)},
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors), ["new_username"])
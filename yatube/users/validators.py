@@ -0,0 +1,23 @@
+from django.core.exceptions import ValidationError
+
+RESERVED_USERNAME = 'Это имя занято адресом сайта.'
+
+
+def reserved_usernames() -> set:
+    """Первые части адресов posts без параметров (new, search и т. д.).
+
+    Эти адреса стоят в posts.urls раньше профиля <username>/, так что
+    пользователь с таким именем не открыл бы свою страницу.
+    """
+    from posts.urls import urlpatterns
+    names = set()
+    for pattern in urlpatterns:
+        first = str(pattern.pattern).split('/')[0]
+        if first and '<' not in first:
+            names.add(first)
+    return names
+
+
+def validate_username(value):
+    if value in reserved_usernames():
+        raise ValidationError(RESERVED_USERNAME, code='reserved')
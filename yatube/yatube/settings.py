@@ -95,6 +95,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Счётчики профиля (posts.stats) меняются сигналами в той же
+        # транзакции, что и сами записи
+        'ATOMIC_REQUESTS': True,
     }
 }
 
@@ -149,20 +152,102 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 NUMBER_PAGINATION_PAGES = 10
 
+# Посты авторов с таким числом подписчиков не раскладываются по лентам,
+# а подмешиваются в ленту подписок при чтении
+TIMELINE_CELEBRITY_THRESHOLD = 1000
+
+# Автор, опустившийся ниже порога не больше чем на столько подписчиков,
+# ещё подмешивается при чтении. Ниже этой полосы его посты дописываются
+# в ленты подписчиков в TIMELINE_WORKERS процессах; 0 — в процессе
+# сервера после коммита (posts.timeline).
+TIMELINE_CELEBRITY_HYSTERESIS = 100
+TIMELINE_WORKERS = 1
+
+# Процессы для нарезки миниатюр; 0 — нарезать в процессе сервера
+# после коммита (posts.thumbnails).
+THUMBNAIL_WORKERS = 2
+
+# Приём картинок (posts.uploads): загрузки пишутся на диск кусками, и
+# слишком большие отклоняются до декодирования. Поворот по EXIF и
+# уменьшение идут в IMAGE_WORKERS процессах; 0 — в процессе сервера.
+# Запрос ждёт пул не дольше IMAGE_NORMALIZE_TIMEOUT секунд, затем форма
+# просит повторить загрузку; на 40 Мп обработка занимает около секунды.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.BoundedUploadHandler']
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_MAX_SIDE = 2560
+IMAGE_WORKERS = 2
+IMAGE_NORMALIZE_TIMEOUT = 10
+
+# Строк в одном запросе NDJSON-выгрузки API (api.export).
+EXPORT_CHUNK_SIZE = 1000
+
+# Журнал изменений для синхронизации клиентов (posts.changes): строк
+# в одном ответе API и сколько дней хранить журнал (prune_changes).
+CHANGES_PAGE_SIZE = 1000
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Сколько секунд API верит снимку пользователя по токену; изменения
+# пользователя и удаление токена сбрасывают его сразу (api.authentication).
+AUTH_CACHE_TIMEOUT = 60
+
+# Один файл кеша на все процессы сервера (см. yatube/sqlite_cache.py).
+# Тесты подменяют его временным через YATUBE_CACHE_FILE, чтобы файл
+# получили и процессы пулов (см. yatube/test_runner.py).
+CACHE_FILE = os.environ.get(
+    'YATUBE_CACHE_FILE', os.path.join(BASE_DIR, 'cache.sqlite3')
+)
 CACHES = {
     'default': {
+        'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+        'LOCATION': CACHE_FILE,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
+    },
+    # Снимки пользователей API: в памяти процесса, не в общем файле
+    # (api.authentication).
+    'auth': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'auth',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+# Тесты получают свой временный файл кеша (см. yatube/test_runner.py).
+TEST_RUNNER = 'yatube.test_runner.TempCacheTestRunner'
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Пользователь по токену кешируется (api.authentication).
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.TokenAuthentication'
+        'api.authentication.CachedJWTAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    # Вёдра токенов в общем кеше (api.throttling): 'anon' — по IP без
+    # входа, 'api' и 'write' — чтение и запись пользователя по умолчанию,
+    # '<throttle_scope>' и '<throttle_scope>_write' — для представлений,
+    # 'token' — все запросы одного токена.
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.TokenBucketThrottle'],
+    # IP клиента — REMOTE_ADDR; за прокси указать число прокси, тогда
+    # адрес берётся из X-Forwarded-For, который они дописывают.
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '120/min',
+        'token': '1200/min',
+        'api': '600/min',
+        'write': '60/min',
+        'posts_write': '20/min',
+        'comments_write': '30/min',
+        'export': '30/hour',
+    },
 }
 
 SIMPLE_JWT = {
@@ -172,6 +257,17 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False,
 }
 
+# Сериализаторы djoser, которые задают имя пользователя, не пускают
+# имена, занятые адресами сайта (api.serializers).
+DJOSER = {
+    'SERIALIZERS': {
+        'user_create': 'api.serializers.UserCreateSerializer',
+        'set_username': 'api.serializers.SetUsernameSerializer',
+        'username_reset_confirm':
+            'api.serializers.UsernameResetConfirmSerializer',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 SWAGGER_SETTINGS = {
@@ -0,0 +1,335 @@
+"""Кеш в файле SQLite, общий для всех процессов одной машины.
+
+В отличие от LocMemCache, все WSGI-процессы видят одни и те же записи
+и одни и те же инвалидации. Файл открыт в режиме WAL, так что чтения
+не ждут записей. Целые числа хранятся как INTEGER, и incr — один
+атомарный UPDATE. Остальные значения хранятся как pickle.
+
+take_token — ведро токенов для ограничения частоты запросов, тоже одним
+атомарным запросом.
+
+Нужен SQLite 3.35 или новее (RETURNING); на более старом бэкенд не
+создаётся.
+
+Число записей ограничено MAX_ENTRIES, объём — необязательным MAX_BYTES.
+При переполнении сначала удаляются просроченные записи, потом
+давно не читанные (LRU). Время чтения обновляется не чаще раза в
+ACCESS_RESOLUTION секунд, поэтому горячие ключи не пишут в файл на
+каждом чтении.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+ACCESS_RESOLUTION = 1.0
+BUSY_TIMEOUT = 30
+VARIABLES_PER_QUERY = 500
+MAX_INTEGER = 2 ** 63
+# UPSERT появился в 3.24, RETURNING (take_token) — в 3.35.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+    ' expires REAL, accessed REAL NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS cache_size ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 0),'
+    ' entries INTEGER NOT NULL, bytes INTEGER NOT NULL'
+    ')',
+    'INSERT OR IGNORE INTO cache_size VALUES (0, 0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache BEGIN'
+    ' UPDATE cache_size SET entries = entries + 1,'
+    ' bytes = bytes + length(NEW.value); END',
+    'CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache BEGIN'
+    ' UPDATE cache_size SET entries = entries - 1,'
+    ' bytes = bytes - length(OLD.value); END',
+    'CREATE TRIGGER IF NOT EXISTS cache_updated AFTER UPDATE OF value'
+    ' ON cache BEGIN'
+    ' UPDATE cache_size SET'
+    ' bytes = bytes - length(OLD.value) + length(NEW.value); END',
+)
+
+UPSERT = (
+    'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+    'expires = excluded.expires, accessed = excluded.accessed'
+)
+NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+# Ведро токенов как GCRA: в значении — момент в мс, когда ведро снова
+# полное. Запрос проходит, если после сдвига момента на interval ведро
+# переполнено не больше чем на burst. Отказ записывает момент со знаком
+# минус, чтобы RETURNING отличал его от успеха.
+TAKE_TOKEN = (
+    'INSERT INTO cache (key, value, expires, accessed) '
+    'VALUES (:key, :now + :interval, (:now + :interval) / 1000.0, :seconds) '
+    'ON CONFLICT (key) DO UPDATE SET '
+    'value = CASE WHEN max(abs(value), :now) + :interval - :now <= :burst '
+    'THEN max(abs(value), :now) + :interval ELSE -abs(value) END, '
+    'expires = CASE WHEN max(abs(value), :now) + :interval - :now <= :burst '
+    'THEN (max(abs(value), :now) + :interval) / 1000.0 '
+    'ELSE abs(value) / 1000.0 END, '
+    'accessed = :seconds '
+    "WHERE typeof(cache.value) = 'integer' "
+    'RETURNING value'
+)
+
+
+def _chunks(items, size=VARIABLES_PER_QUERY):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteCache(BaseCache):
+    """Бэкенд кеша Django поверх файла SQLite (LOCATION — путь к файлу).
+
+    OPTIONS: MAX_ENTRIES и CULL_FREQUENCY как у встроенных бэкендов,
+    MAX_BYTES — предел суммарного размера значений.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise ImproperlyConfigured(
+                'SQLiteCache нужен SQLite %s или новее, у Python — %s.' % (
+                    '.'.join(map(str, MIN_SQLITE_VERSION)),
+                    sqlite3.sqlite_version,
+                )
+            )
+        super().__init__(params)
+        self._path = location
+        self._max_bytes = params.get('OPTIONS', {}).get('MAX_BYTES')
+        self._local = threading.local()
+
+    def _connection(self):
+        """Соединение текущего потока; после fork открывается заново."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            with self._transaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    @staticmethod
+    @contextmanager
+    def _transaction(connection):
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _encode(self, value):
+        if type(value) is int and -MAX_INTEGER <= value < MAX_INTEGER:
+            return value
+        return sqlite3.Binary(pickle.dumps(value, self.pickle_protocol))
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        connection = self._connection()
+        cursor = connection.execute(
+            UPSERT + ' WHERE cache.expires IS NOT NULL'
+            ' AND cache.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout),
+             now, now),
+        )
+        self._cull(connection)
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys_map = {self._key(key, version): key for key in keys}
+        found = self._get_many(list(keys_map))
+        return {keys_map[key]: value for key, value in found.items()}
+
+    def _get_many(self, keys):
+        connection = self._connection()
+        now = time.time()
+        found, stale = {}, []
+        for chunk in _chunks(keys):
+            rows = connection.execute(
+                'SELECT key, value, accessed FROM cache WHERE key IN (%s) '
+                'AND %s' % (', '.join('?' * len(chunk)), NOT_EXPIRED),
+                (*chunk, now),
+            ).fetchall()
+            for key, value, accessed in rows:
+                found[key] = self._decode(value)
+                if now - accessed > ACCESS_RESOLUTION:
+                    stale.append(key)
+        for chunk in _chunks(stale):
+            connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                (now, *chunk),
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        connection.execute(UPSERT, (
+            key, self._encode(value), self.get_backend_timeout(timeout),
+            time.time(),
+        ))
+        self._cull(connection)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self._key(key, version), self._encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        with self._transaction(connection):
+            connection.executemany(UPSERT, rows)
+        self._cull(connection)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND '
+            + NOT_EXPIRED,
+            (self.get_backend_timeout(timeout), now, key, now),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        )
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        connection = self._connection()
+        for chunk in _chunks(keys):
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                chunk,
+            )
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        rows = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND ' + NOT_EXPIRED,
+            (key, time.time()),
+        ).fetchall()
+        return bool(rows)
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов: один UPDATE ... RETURNING."""
+        key = self._key(key, version)
+        rows = self._connection().execute(
+            'UPDATE cache SET value = value + ? WHERE key = ? '
+            "AND typeof(value) = 'integer' AND " + NOT_EXPIRED
+            + ' RETURNING value',
+            (delta, key, time.time()),
+        ).fetchall()
+        if not rows:
+            raise ValueError("Key '%s' not found" % key)
+        return rows[0][0]
+
+    def take_token(self, key, interval, burst, version=None) -> float:
+        """Берёт токен из ведра key; 0, если взят, иначе сколько секунд
+        ждать. interval — мс на токен, burst — ёмкость ведра в мс."""
+        return self.take_tokens([(key, interval, burst)], version)
+
+    def take_tokens(self, buckets, version=None) -> float:
+        """take_token сразу для нескольких вёдер (ключ, interval, burst).
+
+        Все вёдра проверяются в одной транзакции: токены берутся, только
+        если есть во всех, иначе ни одно ведро не меняется.
+        """
+        now = time.time()
+        parameters = [{
+            'key': self._key(key, version), 'now': int(now * 1000),
+            'interval': interval, 'burst': burst, 'seconds': now,
+        } for key, interval, burst in buckets]
+        connection = self._connection()
+        wait = 0
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for bucket in parameters:
+                rows = connection.execute(TAKE_TOKEN, bucket).fetchall()
+                if rows and rows[0][0] < 0:
+                    full = -rows[0][0]
+                    wait = max(wait, full + bucket['interval']
+                               - bucket['burst'] - now * 1000, 1)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('ROLLBACK' if wait else 'COMMIT')
+        if not wait:
+            self._cull(connection)
+        return wait / 1000
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        """Соединения живут всё время процесса, как у LocMemCache."""
+
+    def _over_limit(self, connection):
+        (entries, size), = connection.execute(
+            'SELECT entries, bytes FROM cache_size'
+        ).fetchall()
+        return (entries > self._max_entries
+                or (self._max_bytes and size > self._max_bytes)), entries
+
+    def _cull(self, connection):
+        over, entries = self._over_limit(connection)
+        if not over:
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        over, entries = self._over_limit(connection)
+        while over and entries:
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache')
+                return
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (max(1, entries // self._cull_frequency),),
+            )
+            over, entries = self._over_limit(connection)
@@ -0,0 +1,52 @@
+"""Запуск тестов с отдельным кешем.
+
+Тесты чистят кеш (cache.clear()), поэтому общий файл кеша сервера
+(CACHE_FILE) на время прогона подменяется временным. manage.py test
+делает это через TempCacheTestRunner, pytest — через фикстуру
+в conftest.py в корне репозитория. Тем же temporary_cache() пользуется
+timeline_benchmark.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def temporary_cache():
+    """Подменяет файл кеша временным на время блока.
+
+    Путь уходит и в окружение: процессы пулов (posts.workers)
+    запускаются методом spawn и читают настройки заново.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'cache.sqlite3')
+    caches = {
+        alias: {**params, 'LOCATION': path}
+        if params['LOCATION'] == settings.CACHE_FILE else params
+        for alias, params in settings.CACHES.items()
+    }
+    try:
+        with mock.patch.dict(os.environ, YATUBE_CACHE_FILE=path), \
+                override_settings(CACHE_FILE=path, CACHES=caches):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TempCacheTestRunner(DiscoverRunner):
+    """DiscoverRunner, у которого кеш — временный файл на весь прогон."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_stack = ExitStack()
+        self.cache_stack.enter_context(temporary_cache())
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_stack.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from yatube.sqlite_cache import SQLiteCache
+
+
+def _increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr("counter")
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, "cache.sqlite3")
+        self.cache = SQLiteCache(
+            self.location, {"OPTIONS": {"MAX_ENTRIES": 10}}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_round_trip(self):
+        """Значения любых типов читаются так же, как были записаны."""
+        values = {"int": 7, "text": "текст", "list": [1, "2"], "none": None}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(list(values) + ["nope"]), values)
+        self.assertTrue(self.cache.delete("int"))
+        self.assertIsNone(self.cache.get("int"))
+
+    def test_add_and_expiry(self):
+        self.assertTrue(self.cache.add("key", 1, 0.05))
+        self.assertFalse(self.cache.add("key", 2))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", 3))
+        self.assertEqual(self.cache.get("key"), 3)
+
+    def test_incr_is_shared_between_processes(self):
+        """incr атомарен для нескольких процессов."""
+        self.cache.set("counter", 0)
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get("counter"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_least_recently_read_entries_are_evicted(self):
+        """При переполнении удаляются давно не читанные записи."""
+        for number in range(10):
+            self.cache.set(f"key_{number}", number)
+        self.cache._connection().execute(
+            "UPDATE cache SET accessed = accessed - 10 WHERE key != ?",
+            (self.cache.make_key("key_0"),),
+        )
+        self.cache.set("key_10", 10)
+        self.assertEqual(self.cache.get("key_0"), 0)
+        self.assertEqual(self.cache.get("key_10"), 10)
+        left = self.cache.get_many(f"key_{number}" for number in range(11))
+        self.assertEqual(len(left), 8)
+
+    def test_tests_use_temporary_cache(self):
+        """Тесты не трогают файл кеша сервера, процессы пулов тоже."""
+        self.assertNotEqual(
+            os.path.dirname(cache._path), str(settings.BASE_DIR)
+        )
+        self.assertEqual(os.environ["YATUBE_CACHE_FILE"], cache._path)
+
+    @mock.patch("yatube.sqlite_cache.sqlite3.sqlite_version", "3.31.1")
+    @mock.patch("yatube.sqlite_cache.sqlite3.sqlite_version_info",
+                (3, 31, 1))
+    def test_old_sqlite_is_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "3.31.1"):
+            SQLiteCache(self.location, {})